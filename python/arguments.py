@@ -1,7 +1,7 @@
 """Argument parsing"""
 
+import os
 import sys
-import xml.etree.ElementTree as ET
 from argparse import ArgumentParser, FileType
 from error import StatusCode, exit_program
 
@@ -19,6 +19,18 @@ class Arguments():
     def __init__(self):
         self.source = None
         self.input = None
+        self.engine = None
+        self.cache_dir = None
+        self.optimize = False
+        self.compile_to = None
+        self.run_compiled = None
+        self.stats = None
+        self.profile = None
+        self.profile_weight = None
+        self.coverage = None
+        self.startup_profile = False
+        self.inputs = None
+        self.jobs = None
 
     def parse(self):
         """Parse arguments"""
@@ -30,6 +42,33 @@ class Arguments():
         parser.add_argument("-i", "--input", type=FileType("r"),
                             help=("file with inputs for the actual"
                                   "interpretation of the specified source code"))
+        parser.add_argument("--engine", choices=["classic", "threaded", "tracing"],
+                            default="classic",
+                            help="execution engine used to run the program")
+        parser.add_argument("--cache-dir",
+                            help="directory for caching loaded programs")
+        parser.add_argument("-O", "--optimize", action="store_true",
+                            help="optimize the program before running it")
+        parser.add_argument("--compile-to", metavar="FILE",
+                            help="compile the program to a Python module instead of running it")
+        parser.add_argument("--run-compiled", metavar="FILE",
+                            help="run a Python module created by --compile-to")
+        parser.add_argument("--stats", metavar="FILE",
+                            help="write execution statistics to a file")
+        parser.add_argument("--profile", metavar="FILE",
+                            help="write collapsed call stacks of the run to a file")
+        parser.add_argument("--profile-weight", choices=["time", "instructions"],
+                            default="time",
+                            help="weight of call stacks written by --profile")
+        parser.add_argument("--coverage", metavar="FILE",
+                            help="write bitmap of executed instructions to a file")
+        parser.add_argument("--inputs", nargs="+", metavar="FILE",
+                            help=("run the program once for every input file, writing "
+                                  "FILE.stdout, FILE.stderr and FILE.rc"))
+        parser.add_argument("-j", "--jobs", type=int, default=os.cpu_count() or 1,
+                            help="number of inputs of --inputs run at the same time")
+        parser.add_argument("--startup-profile", action="store_true",
+                            help="report timings of startup phases to standard error")
         parser.add_argument("-h", "--help", action="store_true", dest="help",
                             help="show this help message and exit")
         args = parser.parse_args()
@@ -43,8 +82,40 @@ class Arguments():
                 exit_program(StatusCode.MISSING_PARAM,
                              "Help requested with other arguments")
 
+        # Statistics and profiles are collected by instrumented classic loops
+        if args.stats is not None and args.profile is not None:
+            exit_program(StatusCode.MISSING_PARAM,
+                         "Statistics and profile cannot be collected together")
+        if ((args.stats is not None or args.profile is not None)
+                and (args.engine != "classic" or args.run_compiled is not None)):
+            exit_program(StatusCode.MISSING_PARAM,
+                         "Statistics are collected only by the classic engine")
+        # Coverage is mapped to instructions of the unoptimized program
+        if args.coverage is not None and (
+                args.stats is not None or args.profile is not None
+                or args.engine != "classic" or args.run_compiled is not None
+                or args.compile_to is not None):
+            exit_program(StatusCode.MISSING_PARAM,
+                         "Coverage is collected only by the classic engine")
+        if args.coverage is not None and args.optimize:
+            exit_program(StatusCode.MISSING_PARAM,
+                         "Coverage cannot be collected from optimized programs")
+        # Every input is run separately from the loaded program
+        if args.inputs is not None and (
+                args.input is not None or args.run_compiled is not None
+                or args.compile_to is not None or args.stats is not None
+                or args.profile is not None or args.coverage is not None):
+            exit_program(StatusCode.MISSING_PARAM,
+                         "Multiple inputs used together with single-run options")
+        if args.jobs < 1:
+            exit_program(StatusCode.MISSING_PARAM, "Invalid number of jobs")
+        # Compiled program replaces the source
+        if args.run_compiled is not None:
+            if args.source is not None or args.compile_to is not None:
+                exit_program(StatusCode.MISSING_PARAM,
+                             "Compiled program used together with source")
         # Source or input has to be specified
-        if (args.source is None and args.input is None):
+        elif (args.source is None and args.input is None and args.inputs is None):
             exit_program(StatusCode.MISSING_PARAM,
                          "Missing source or input file")
         # Replace second file with stdin if one of them is not specified
@@ -52,16 +123,17 @@ class Arguments():
             args.source = sys.stdin
         if args.input is None:
             args.input = sys.stdin
-        # Read source file
-        try:
-            xml = args.source.read()
-        except OSError:
-            exit_program(StatusCode.INPUT_ERROR, "Input error")
-        # Parse XML
-        try:
-            parsed = ET.fromstring(xml)
-        except ET.ParseError:
-            exit_program(StatusCode.MALLFORMED, "XML error")
-
-        self.source = parsed
+        self.source = args.source
         self.input = args.input
+        self.engine = args.engine
+        self.cache_dir = args.cache_dir
+        self.optimize = args.optimize
+        self.compile_to = args.compile_to
+        self.run_compiled = args.run_compiled
+        self.stats = args.stats
+        self.profile = args.profile
+        self.profile_weight = args.profile_weight
+        self.coverage = args.coverage
+        self.startup_profile = args.startup_profile
+        self.inputs = args.inputs
+        self.jobs = args.jobs
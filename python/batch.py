@@ -0,0 +1,225 @@
+"""
+Run all IPPcode23 programs of a directory tree across a process pool
+
+Every <name>.src is run with <name>.in as its input and checked against
+the expected exit code in <name>.rc and, when it is 0, against the
+expected output in <name>.out. Missing .in and .out files are empty and
+a missing .rc file means 0, as in test.php.
+"""
+
+import io
+import json
+import os
+import signal
+import sys
+import traceback
+from concurrent.futures import ProcessPoolExecutor
+from time import perf_counter
+from arguments import Parser
+from error import StatusCode, exit_program
+from output import stdout
+from program import Program
+from runner import Runner
+
+# Exit code reported for programs which ran out of time
+TIMEOUT = "timeout"
+# Number of chunks of programs given to every worker process
+CHUNKS_PER_JOB = 8
+
+
+class Timeout(BaseException):
+    """Program ran longer than allowed
+
+    Raised by the timer anywhere in the worker, so it is not an Exception,
+    which blanket handlers of the loader would catch.
+    """
+
+
+class Result:
+    """Result of one program of the batch"""
+
+    def __init__(self, name, status, expected_status, output_matches, time):
+        self.name = name
+        self.status = status
+        self.expected_status = expected_status
+        self.output_matches = output_matches
+        self.time = time
+
+    @property
+    def passed(self):
+        """Check whether the program ended as expected"""
+        return self.status == self.expected_status and (
+            self.status != 0 or self.output_matches)
+
+    def to_dict(self):
+        """Get result as JSON object"""
+        return {
+            "name": self.name,
+            "status": self.status,
+            "expected_status": self.expected_status,
+            "passed": self.passed,
+            "time": self.time,
+        }
+
+
+class Task:
+    """Program of the batch with options of its run"""
+
+    def __init__(self, directory, name, output_dir, optimize, engine, timeout):
+        self.directory = directory
+        self.name = name
+        self.output_dir = output_dir
+        self.optimize = optimize
+        self.engine = engine
+        self.timeout = timeout
+
+    def run(self):
+        """Run the program in this process, write its output and get result"""
+        base = os.path.join(self.directory, self.name)
+        target = os.path.join(self.output_dir, self.name)
+        os.makedirs(os.path.dirname(target), exist_ok=True)
+        with open(target + ".stdout", "w", encoding="utf-8") as output, \
+                open(target + ".stderr", "w", encoding="utf-8") as errors:
+            started = perf_counter()
+            status = self._execute(base, output, errors)
+            time = perf_counter() - started
+        with open(target + ".rc", "w", encoding="utf-8") as file:
+            file.write("{}\n".format(status))
+        expected_status = int(_read(base + ".rc", "0").strip() or 0)
+        with open(target + ".stdout", "r", encoding="utf-8") as file:
+            output_matches = file.read() == _read(base + ".out", "")
+        return Result(self.name, status, expected_status, output_matches, time)
+
+    def _execute(self, base, output, errors):
+        """Load and run the program with standard streams redirected"""
+        (sys.stdout, sys.stderr) = (output, errors)
+        previous = signal.signal(signal.SIGALRM, _alarm)
+        if self.timeout is not None:
+            signal.setitimer(signal.ITIMER_REAL, self.timeout)
+        status = 0
+        try:
+            with open(base + ".src", "r", encoding="utf-8") as source:
+                program = Program(source, self.optimize)
+            runner = Runner(program, io.StringIO(_read(base + ".in", "")))
+            _engine(runner, self.engine).run()
+        except SystemExit as exit_:
+            status = exit_.code if isinstance(exit_.code, int) else 1
+        except Timeout:
+            status = TIMEOUT
+        except Exception:  # pylint: disable=broad-except
+            traceback.print_exc()
+            status = 1
+        finally:
+            signal.setitimer(signal.ITIMER_REAL, 0)
+            signal.signal(signal.SIGALRM, previous)
+            # Output of a program stopped by the timeout goes to its own file
+            stdout.flush()
+            (sys.stdout, sys.stderr) = (sys.__stdout__, sys.__stderr__)
+        return status
+
+
+def find_programs(directory):
+    """Get names of all programs in directory tree without extensions"""
+    names = []
+    for (path, _, files) in os.walk(directory):
+        for file in files:
+            if file.endswith(".src"):
+                names.append(os.path.relpath(os.path.join(path, file[:-4]), directory))
+    return sorted(names)
+
+
+def run_batch(tasks, jobs):
+    """Run tasks on a pool of processes, get their results in order of tasks"""
+    # Small chunks keep workers busy evenly and save messages for short programs
+    chunk_size = max(1, len(tasks) // (jobs * CHUNKS_PER_JOB))
+    with ProcessPoolExecutor(max_workers=jobs) as pool:
+        return list(pool.map(_run, tasks, chunksize=chunk_size))
+
+
+def print_summary(results, wall_time, file):
+    """Print result of every program and totals"""
+    for result in results:
+        if result.passed:
+            verdict = "PASS"
+        elif result.status == TIMEOUT:
+            verdict = "TIME"
+        else:
+            verdict = "FAIL"
+        print("{} {:9.3f}s {} (exit {}, expected {})".format(
+            verdict, result.time, result.name, result.status, result.expected_status),
+            file=file)
+    passed = sum(1 for result in results if result.passed)
+    timeouts = sum(1 for result in results if result.status == TIMEOUT)
+    print("Passed {}/{}, timed out {}, run time {:.3f}s, wall time {:.3f}s".format(
+        passed, len(results), timeouts, sum(result.time for result in results), wall_time),
+        file=file)
+
+
+def _engine(runner, name):
+    if name == "threaded":
+        from threaded import ThreadedEngine
+        return ThreadedEngine(runner)
+    if name == "tracing":
+        from tracing import TracingEngine
+        return TracingEngine(runner)
+    return runner
+
+
+def _run(task):
+    return task.run()
+
+
+def _alarm(signum, frame):
+    raise Timeout
+
+
+def _read(path, default):
+    """Read text file, get default if it does not exist"""
+    try:
+        with open(path, "r", encoding="utf-8") as file:
+            return file.read()
+    except FileNotFoundError:
+        return default
+
+
+if __name__ == "__main__":
+    parser = Parser(description="Run all IPPcode23 programs of a directory tree")
+    parser.add_argument("directory",
+                        help="directory searched for .src files")
+    parser.add_argument("-o", "--output-dir", default="batch-output", metavar="DIR",
+                        help="directory for .stdout, .stderr and .rc files of programs")
+    parser.add_argument("-j", "--jobs", type=int, default=os.cpu_count() or 1,
+                        help="number of worker processes")
+    parser.add_argument("--timeout", type=float, metavar="SECONDS",
+                        help="time limit of every program")
+    parser.add_argument("--summary", metavar="FILE",
+                        help="write results of all programs to a JSON file")
+    parser.add_argument("--engine", choices=["classic", "threaded", "tracing"],
+                        default="classic",
+                        help="execution engine used to run the programs")
+    parser.add_argument("-O", "--optimize", action="store_true",
+                        help="optimize programs before running them")
+    args = parser.parse_args()
+    if args.jobs < 1:
+        exit_program(StatusCode.MISSING_PARAM, "Invalid number of jobs")
+    if not os.path.isdir(args.directory):
+        exit_program(StatusCode.INPUT_ERROR, "Directory does not exist")
+
+    started = perf_counter()
+    try:
+        results = run_batch(
+            [Task(args.directory, name, args.output_dir, args.optimize,
+                  args.engine, args.timeout)
+             for name in find_programs(args.directory)],
+            args.jobs)
+    except OSError:
+        exit_program(StatusCode.OUTPUT_ERROR, "Output error")
+    print_summary(results, perf_counter() - started, sys.stdout)
+    if args.summary is not None:
+        try:
+            with open(args.summary, "w", encoding="utf-8") as file:
+                json.dump([result.to_dict() for result in results], file, indent=2)
+                file.write("\n")
+        except OSError:
+            exit_program(StatusCode.OUTPUT_ERROR, "Output error")
+    exit(0 if all(result.passed for result in results) else 1)
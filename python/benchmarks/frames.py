@@ -0,0 +1,127 @@
+"""
+Benchmark of local and temporary frames
+
+Generated programs define many distinct local names in a function which
+is called only once, so the frames of the measured code must not pay for
+names they never define. Every program is run by interpret.py in its own
+process, and its run time and peak resident memory are reported.
+"""
+
+import os
+import subprocess
+import sys
+import tempfile
+from argparse import ArgumentParser
+from time import perf_counter
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+class Generator:
+    """Builder of XML source of an IPPcode23 program"""
+
+    def __init__(self):
+        self.lines = []
+
+    def add(self, opcode, *args):
+        """Append instruction with (type, text) arguments"""
+        elements = "".join(
+            '<arg{0} type="{1}">{2}</arg{0}>'.format(position, arg_type, text)
+            for (position, (arg_type, text)) in enumerate(args, 1))
+        self.lines.append('<instruction order="{}" opcode="{}">{}</instruction>'.format(
+            len(self.lines) + 1, opcode, elements))
+
+    def big_function(self, names):
+        """Add function BIG defining many local names"""
+        self.add("LABEL", ("label", "big"))
+        self.add("CREATEFRAME")
+        self.add("PUSHFRAME")
+        for index in range(names):
+            self.add("DEFVAR", ("var", "LF@big%d" % index))
+        self.add("POPFRAME")
+        self.add("RETURN")
+
+    def source(self):
+        """Get XML source of the program"""
+        return "\n".join(['<?xml version="1.0" encoding="UTF-8"?>',
+                          '<program language="IPPcode23">']
+                         + self.lines + ["</program>", ""])
+
+
+def recursion(names, depth):
+    """Program recursing depth times with every frame kept on the stack"""
+    program = Generator()
+    program.add("JUMP", ("label", "main"))
+    program.big_function(names)
+    program.add("LABEL", ("label", "rec"))
+    program.add("PUSHFRAME")
+    program.add("JUMPIFEQ", ("label", "done"), ("var", "LF@n"), ("int", "0"))
+    program.add("CREATEFRAME")
+    program.add("DEFVAR", ("var", "TF@n"))
+    program.add("SUB", ("var", "TF@n"), ("var", "LF@n"), ("int", "1"))
+    program.add("CALL", ("label", "rec"))
+    program.add("LABEL", ("label", "done"))
+    program.add("POPFRAME")
+    program.add("RETURN")
+    program.add("LABEL", ("label", "main"))
+    program.add("CALL", ("label", "big"))
+    program.add("CREATEFRAME")
+    program.add("DEFVAR", ("var", "TF@n"))
+    program.add("MOVE", ("var", "TF@n"), ("int", str(depth)))
+    program.add("CALL", ("label", "rec"))
+    return program.source()
+
+
+def create_frames(names, count):
+    """Program creating count temporary frames with one variable each"""
+    program = Generator()
+    program.add("JUMP", ("label", "main"))
+    program.big_function(names)
+    program.add("LABEL", ("label", "main"))
+    program.add("CALL", ("label", "big"))
+    program.add("DEFVAR", ("var", "GF@i"))
+    program.add("MOVE", ("var", "GF@i"), ("int", "0"))
+    program.add("LABEL", ("label", "loop"))
+    program.add("CREATEFRAME")
+    program.add("DEFVAR", ("var", "TF@x"))
+    program.add("ADD", ("var", "GF@i"), ("var", "GF@i"), ("int", "1"))
+    program.add("JUMPIFNEQ", ("label", "loop"), ("var", "GF@i"), ("int", str(count)))
+    return program.source()
+
+
+def measure(source, options):
+    """Run the program, get its run time and peak resident memory in MiB"""
+    with tempfile.NamedTemporaryFile("w", suffix=".src", encoding="utf-8") as file:
+        file.write(source)
+        file.flush()
+        started = perf_counter()
+        process = subprocess.Popen(
+            [sys.executable, os.path.join(ROOT, "interpret.py"), "--source=" + file.name,
+             "--input=" + os.devnull] + options, stdout=subprocess.DEVNULL)
+        (_, status, usage) = os.wait4(process.pid, 0)
+        time = perf_counter() - started
+    status = os.waitstatus_to_exitcode(status)
+    if status != 0:
+        sys.exit("Benchmark program failed with exit code {}".format(status))
+    # Linux reports peak memory in KiB
+    return (time, usage.ru_maxrss / 1024)
+
+
+if __name__ == "__main__":
+    parser = ArgumentParser(description="Benchmark of local and temporary frames")
+    parser.add_argument("--names", type=int, default=2000,
+                        help="number of distinct local names of the program")
+    parser.add_argument("--depth", type=int, default=3000,
+                        help="depth of the recursion")
+    parser.add_argument("--frames", type=int, default=300000,
+                        help="number of temporary frames created in a loop")
+    parser.add_argument("--engine", choices=["classic", "threaded", "tracing"],
+                        default="classic",
+                        help="execution engine used to run the programs")
+    args = parser.parse_args()
+
+    options = ["--engine=" + args.engine]
+    for (name, source) in (("recursion", recursion(args.names, args.depth)),
+                           ("createframe", create_frames(args.names, args.frames))):
+        (time, memory) = measure(source, options)
+        print("{:12} {:8.3f}s {:8.1f} MiB".format(name, time, memory))
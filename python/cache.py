@@ -0,0 +1,70 @@
+"""On-disk cache of loaded programs"""
+
+import glob
+import hashlib
+import os
+import pickle
+import tempfile
+
+# Header of every cache entry
+MAGIC = b"IPPC\x01"
+
+
+class ProgramCache:
+    """Cache of validated and decoded programs keyed by hash of their XML
+
+    Every entry starts with a fingerprint of the interpreter sources, so
+    entries written by a different interpreter version are ignored.
+    Unreadable or corrupt entries are treated as cache misses.
+    """
+
+    def __init__(self, directory, variant=""):
+        self.directory = directory
+        # Programs loaded with different options are cached separately
+        self.variant = variant
+        self.fingerprint = self._fingerprint()
+
+    def load(self, source):
+        """Load cached program, return None on miss"""
+        try:
+            with open(self._path(source), "rb") as file:
+                header = file.read(len(MAGIC) + len(self.fingerprint))
+                if header != MAGIC + self.fingerprint:
+                    return None
+                return pickle.load(file)
+        except Exception:
+            return None
+
+    def store(self, source, program):
+        """Store program in cache, failures are ignored"""
+        try:
+            os.makedirs(self.directory, exist_ok=True)
+            # Write to temporary file first so readers never see partial entries
+            (handle, temporary) = tempfile.mkstemp(dir=self.directory)
+        except Exception:
+            return
+        try:
+            with os.fdopen(handle, "wb") as file:
+                file.write(MAGIC + self.fingerprint)
+                pickle.dump(program, file, pickle.HIGHEST_PROTOCOL)
+            os.replace(temporary, self._path(source))
+        except Exception:
+            # Failed entry must not be left behind in the cache directory
+            try:
+                os.unlink(temporary)
+            except OSError:
+                pass
+
+    def _path(self, source):
+        key = hashlib.sha256(self.variant.encode())
+        key.update(source.encode("utf-8", "surrogateescape"))
+        return os.path.join(self.directory, key.hexdigest() + ".ippc")
+
+    @staticmethod
+    def _fingerprint():
+        digest = hashlib.sha256()
+        directory = os.path.dirname(os.path.abspath(__file__))
+        for path in sorted(glob.glob(os.path.join(directory, "*.py"))):
+            with open(path, "rb") as file:
+                digest.update(file.read())
+        return digest.digest()
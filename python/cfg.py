@@ -0,0 +1,79 @@
+"""Control-flow graph of a program"""
+
+from instructions import Label, Jump, JumpIfEq, JumpIfNeq, Call, Return, Exit
+
+
+class BasicBlock:
+    """Basic block, instructions from start up to (excluding) end"""
+
+    def __init__(self, start, end):
+        self.start = start
+        self.end = end
+        self.successors = []
+        self.predecessors = []
+
+
+class ControlFlowGraph:
+    """Control-flow graph built from labels, jumps, calls and returns
+
+    A CALL has an edge both to its target and to the instruction after it,
+    where the matching RETURN continues. RETURN and EXIT have no successors.
+    """
+
+    def __init__(self, instructions):
+        self.instructions = instructions
+        self.labels = {}
+        for index, instruction in enumerate(instructions):
+            if isinstance(instruction, Label):
+                self.labels[instruction.args[0].value] = index
+        self.blocks = []
+        # Block starting at given instruction index
+        self.block_at = {}
+        self._split_blocks()
+        self._connect_blocks()
+
+    def reachable(self):
+        """Get blocks reachable from program start"""
+        if not self.blocks:
+            return []
+        seen = {0}
+        pending = [self.blocks[0]]
+        while pending:
+            block = pending.pop()
+            for successor in block.successors:
+                if successor.start not in seen:
+                    seen.add(successor.start)
+                    pending.append(successor)
+        return [block for block in self.blocks if block.start in seen]
+
+    def targets(self):
+        """Get names of labels used by jumps and calls"""
+        return {instruction.args[0].value for instruction in self.instructions
+                if isinstance(instruction, (Jump, JumpIfEq, JumpIfNeq, Call))}
+
+    def _split_blocks(self):
+        leaders = {0}
+        for index, instruction in enumerate(self.instructions):
+            if isinstance(instruction, Label):
+                leaders.add(index)
+            elif isinstance(instruction, (Jump, JumpIfEq, JumpIfNeq, Call, Return, Exit)):
+                leaders.add(index + 1)
+        leaders = sorted(leader for leader in leaders
+                         if leader < len(self.instructions))
+        for (start, end) in zip(leaders, leaders[1:] + [len(self.instructions)]):
+            block = BasicBlock(start, end)
+            self.blocks.append(block)
+            self.block_at[start] = block
+
+    def _connect_blocks(self):
+        for block in self.blocks:
+            last = self.instructions[block.end - 1]
+            successors = []
+            if isinstance(last, (Jump, JumpIfEq, JumpIfNeq, Call)):
+                successors.append(self.block_at[self.labels[last.args[0].value]])
+            if not isinstance(last, (Jump, Return, Exit)) and block.end in self.block_at:
+                successors.append(self.block_at[block.end])
+            for successor in successors:
+                if successor not in block.successors:
+                    block.successors.append(successor)
+                    successor.predecessors.append(block)
@@ -0,0 +1,157 @@
+/*
+ * Client of the resident IPPcode23 interpreter server
+ *
+ * Takes the same arguments as interpret.py, the socket of the server is
+ * given by the IPP_SERVER_SOCKET environment variable or by the --socket
+ * option, which has to be the first argument. Standard input, output and
+ * error are passed to the server, which runs the interpreter with them,
+ * and the exit code of the interpreter is returned. Unlike client.py it
+ * does not start a Python interpreter, so a run costs only a fork on the
+ * server side.
+ *
+ * Build: cc -O2 -o ipp-client client.c
+ */
+
+#include <limits.h>
+#include <stdio.h>
+#include <stdlib.h>
+#include <string.h>
+#include <sys/socket.h>
+#include <sys/types.h>
+#include <sys/uio.h>
+#include <sys/un.h>
+#include <unistd.h>
+
+/* Environment variable with path of the server socket */
+#define SOCKET_VARIABLE "IPP_SERVER_SOCKET"
+/* Exit code used when the server cannot be reached */
+#define INTERNAL_ERROR 99
+/* Standard input, output and error of the client */
+#define DESCRIPTORS 3
+
+static int fail(const char *message)
+{
+    fprintf(stderr, "%s\n", message);
+    return INTERNAL_ERROR;
+}
+
+/* Join working directory and arguments with null characters */
+static char *request_data(char *cwd, int argc, char **argv, size_t *size)
+{
+    size_t length = strlen(cwd);
+    for (int i = 0; i < argc; i++) {
+        length += 1 + strlen(argv[i]);
+    }
+    char *data = malloc(length);
+    if (data == NULL) {
+        return NULL;
+    }
+    size_t position = strlen(cwd);
+    memcpy(data, cwd, position);
+    for (int i = 0; i < argc; i++) {
+        data[position++] = '\0';
+        memcpy(data + position, argv[i], strlen(argv[i]));
+        position += strlen(argv[i]);
+    }
+    *size = length;
+    return data;
+}
+
+/* Send data with standard streams attached to its first chunk */
+static int send_request(int connection, char *data, size_t size)
+{
+    int descriptors[DESCRIPTORS] = {0, 1, 2};
+    char control[CMSG_SPACE(sizeof(descriptors))];
+    memset(control, 0, sizeof(control));
+    struct iovec vector = {.iov_base = data, .iov_len = size};
+    struct msghdr message = {0};
+    message.msg_iov = &vector;
+    message.msg_iovlen = 1;
+    message.msg_control = control;
+    message.msg_controllen = sizeof(control);
+    struct cmsghdr *header = CMSG_FIRSTHDR(&message);
+    header->cmsg_level = SOL_SOCKET;
+    header->cmsg_type = SCM_RIGHTS;
+    header->cmsg_len = CMSG_LEN(sizeof(descriptors));
+    memcpy(CMSG_DATA(header), descriptors, sizeof(descriptors));
+
+    ssize_t sent = sendmsg(connection, &message, 0);
+    if (sent < 0) {
+        return -1;
+    }
+    for (size_t position = sent; position < size; position += sent) {
+        sent = send(connection, data + position, size - position, 0);
+        if (sent < 0) {
+            return -1;
+        }
+    }
+    return shutdown(connection, SHUT_WR);
+}
+
+/* Read exit code replied by the server, -1 if there is none */
+static int read_status(int connection)
+{
+    char reply[16];
+    size_t length = 0;
+    ssize_t count;
+    while ((count = read(connection, reply + length, sizeof(reply) - 1 - length)) > 0) {
+        length += count;
+    }
+    if (count < 0 || length == 0) {
+        return -1;
+    }
+    reply[length] = '\0';
+    char *end;
+    long status = strtol(reply, &end, 10);
+    if (*end != '\0' || status < 0 || status > 255) {
+        return -1;
+    }
+    return (int)status;
+}
+
+int main(int argc, char **argv)
+{
+    const char *path = getenv(SOCKET_VARIABLE);
+    int first = 1;
+    if (argc > 1 && strncmp(argv[1], "--socket=", strlen("--socket=")) == 0) {
+        path = argv[1] + strlen("--socket=");
+        first = 2;
+    } else if (argc > 2 && strcmp(argv[1], "--socket") == 0) {
+        path = argv[2];
+        first = 3;
+    }
+    if (path == NULL) {
+        return fail("Missing server socket");
+    }
+
+    struct sockaddr_un address = {0};
+    address.sun_family = AF_UNIX;
+    if (strlen(path) >= sizeof(address.sun_path)) {
+        return fail("Server error");
+    }
+    strcpy(address.sun_path, path);
+
+    char cwd[PATH_MAX];
+    if (getcwd(cwd, sizeof(cwd)) == NULL) {
+        return fail("Server error");
+    }
+    size_t size;
+    char *data = request_data(cwd, argc - first, argv + first, &size);
+    if (data == NULL) {
+        return fail("Server error");
+    }
+
+    int connection = socket(AF_UNIX, SOCK_STREAM, 0);
+    if (connection < 0
+            || connect(connection, (struct sockaddr *)&address, sizeof(address)) < 0
+            || send_request(connection, data, size) < 0) {
+        return fail("Server error");
+    }
+    free(data);
+    int status = read_status(connection);
+    close(connection);
+    if (status < 0) {
+        return fail("Server error");
+    }
+    return status;
+}
@@ -0,0 +1,61 @@
+"""
+Client of the resident IPPcode23 interpreter server
+
+Takes the same arguments as interpret.py, the socket of the server is
+given by the IPP_SERVER_SOCKET environment variable or by the --socket
+option, which has to be the first argument. Starting this client still
+costs a Python interpreter, so runs from the command line should use
+ipp-client built from client.c, and this module is meant for Python
+tools sending many requests.
+"""
+
+import os
+import socket
+import sys
+
+# Environment variable with path of the server socket
+SOCKET_VARIABLE = "IPP_SERVER_SOCKET"
+# Exit code used when the server cannot be reached
+INTERNAL_ERROR = 99
+
+
+def split_socket(argv):
+    """Get socket path and arguments passed to the interpreter"""
+    if argv and argv[0].startswith("--socket="):
+        return (argv[0][len("--socket="):], argv[1:])
+    if len(argv) > 1 and argv[0] == "--socket":
+        return (argv[1], argv[2:])
+    return (os.environ.get(SOCKET_VARIABLE), argv)
+
+
+def request(path, argv):
+    """Run interpreter with arguments on the server, get its exit code"""
+    sys.stdout.flush()
+    sys.stderr.flush()
+    data = "\0".join([os.getcwd()] + argv).encode("utf-8", "surrogateescape")
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as connection:
+        connection.connect(path)
+        # Standard streams are passed along with the first chunk
+        sent = socket.send_fds(connection, [data], [0, 1, 2])
+        connection.sendall(data[sent:])
+        connection.shutdown(socket.SHUT_WR)
+        reply = b""
+        while True:
+            chunk = connection.recv(64)
+            if not chunk:
+                break
+            reply += chunk
+    return int(reply)
+
+
+if __name__ == "__main__":
+    (socket_path, arguments) = split_socket(sys.argv[1:])
+    if socket_path is None:
+        print("Missing server socket", file=sys.stderr)
+        sys.exit(INTERNAL_ERROR)
+    try:
+        status = request(socket_path, arguments)
+    except (OSError, ValueError):
+        print("Server error", file=sys.stderr)
+        status = INTERNAL_ERROR
+    sys.exit(status)
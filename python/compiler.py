@@ -0,0 +1,562 @@
+"""Ahead-of-time compilation of programs to Python modules"""
+
+from importlib.machinery import SourceFileLoader
+from importlib.util import module_from_spec, spec_from_loader
+from value import DataType, NIL
+from frame import FrameKind
+from error import StatusCode, exit_program
+from inference import UNCHECKED
+import instructions as ins
+
+# Unchecked instructions and the instructions they specialize
+CHECKED = {unchecked: checked for (checked, unchecked) in UNCHECKED.items()}
+
+# Python types of literal values
+PYTHON_TYPES = {
+    DataType.INT: int,
+    DataType.STRING: str,
+    DataType.BOOL: bool,
+    DataType.NIL: type(NIL),
+}
+
+# Start of every generated module
+HEADER = '''"""IPPcode23 program compiled to a Python module"""
+
+import sys
+from error import StatusCode, exit_program
+from output import stdout
+from reader import InputReader
+from value import NIL, UNINITIALIZED, type_of
+
+TYPE_NAMES = {int: "int", str: "string", bool: "bool", type(NIL): "nil"}
+
+
+def missing(value):
+    """Exit on a read of an undefined or uninitialized variable"""
+    if value is None:
+        exit_program(StatusCode.MISSING_VAR, "Variable not found")
+    exit_program(StatusCode.MISSING_VALUE, "Variable is not initialized")
+
+
+def run(input_file):
+    """Run the program"""
+    input_reader = InputReader(input_file)
+    write = stdout.write
+    lf = None
+    tf = None
+    frames = []
+    stack = []
+    calls = []
+'''
+
+INVALID_TYPE = 'exit_program(StatusCode.INVALID_TYPE, "Invalid argument type")'
+
+
+class Compiler:
+    """Compiler of a loaded program to source of a Python module
+
+    Code between entry points (program start, jump and call targets and
+    return points of calls) is emitted as straight-line Python and global
+    variables become local variables of the generated function. A dispatch
+    loop picks the code to continue with only when a jump, call or return
+    leaves the straight line.
+    """
+
+    def __init__(self, program):
+        self.program = program
+        self.instructions = program.instructions
+        self.lines = []
+        self.indent = 0
+        # Index of the instruction being compiled
+        self.index = 0
+        # Global variables known to be defined and initialized in the region
+        self.defined = set()
+        self.initialized = set()
+        # Global variables stored to by the instruction being compiled
+        self.stored = []
+        self.emitters = {
+            ins.Move: self._move,
+            ins.CreateFrame: self._create_frame,
+            ins.PushFrame: self._push_frame,
+            ins.PopFrame: self._pop_frame,
+            ins.DefVar: self._defvar,
+            ins.Call: self._call,
+            ins.Return: self._return,
+            ins.PushS: self._pushs,
+            ins.PopS: self._pops,
+            ins.Add: self._arithmetic,
+            ins.Sub: self._arithmetic,
+            ins.Mul: self._arithmetic,
+            ins.IDiv: self._arithmetic,
+            ins.Lt: self._relational,
+            ins.Gt: self._relational,
+            ins.Eq: self._eq,
+            ins.And: self._logical,
+            ins.Or: self._logical,
+            ins.Not: self._not,
+            ins.Int2Char: self._int2char,
+            ins.Stri2Int: self._stri2int,
+            ins.Read: self._read,
+            ins.Write: self._write,
+            ins.Concat: self._concat,
+            ins.StrLen: self._strlen,
+            ins.GetChar: self._getchar,
+            ins.SetChar: self._setchar,
+            ins.Type: self._type,
+            ins.Label: self._label,
+            ins.Jump: self._jump,
+            ins.JumpIfEq: self._conditional_jump,
+            ins.JumpIfNeq: self._conditional_jump,
+            ins.Exit: self._exit,
+            ins.DPrint: self._dprint,
+            ins.Break: self._break,
+        }
+
+    def compile(self):
+        """Get source of module with run(input_file) running the program"""
+        self.lines = [HEADER.rstrip("\n")]
+        self.indent = 1
+        for slot in range(len(self.program.global_layout.names)):
+            self._line("g%d = None" % slot)
+        entries = self._entries()
+        regions = list(zip(entries, entries[1:] + [len(self.instructions)]))
+        self._line("block = 0")
+        self._line("while True:")
+        self.indent += 1
+        self._dispatch(regions)
+        self.indent -= 1
+        self._line("stdout.flush()")
+        return "\n".join(self.lines) + "\n"
+
+    def _entries(self):
+        """Get sorted indexes where control can enter other than falling through"""
+        entries = {0}
+        for (index, instruction) in enumerate(self.instructions):
+            instruction = _unwrap(instruction)
+            if isinstance(instruction, (ins.Call, ins.Jump, ins.JumpIfEq, ins.JumpIfNeq)):
+                entries.add(instruction.target)
+            if isinstance(instruction, ins.Call):
+                entries.add(index + 1)
+        return sorted(entries)
+
+    def _dispatch(self, regions):
+        """Emit binary decision tree selecting region by block"""
+        if len(regions) == 1:
+            self._region(*regions[0])
+            return
+        middle = len(regions) // 2
+        self._line("if block < %d:" % regions[middle][0])
+        self.indent += 1
+        self._dispatch(regions[:middle])
+        self.indent -= 1
+        self._line("else:")
+        self.indent += 1
+        self._dispatch(regions[middle:])
+        self.indent -= 1
+
+    def _region(self, start, end):
+        # Global variables are never undefined again, so their checks are
+        # needed only once in straight-line code
+        self.defined = set()
+        self.initialized = set()
+        for index in range(start, end):
+            self.index = index
+            instruction = _unwrap(self.instructions[index])
+            self._line("# %d: %s" % (index, _describe(instruction)))
+            checked = type(instruction) not in CHECKED
+            emit = self.emitters[CHECKED.get(type(instruction), type(instruction))]
+            self.stored = []
+            if emit(instruction, checked):
+                # Rest of the region is unreachable
+                return
+            self.initialized.update(self.stored)
+        if end < len(self.instructions):
+            self._line("block = %d" % end)
+            self._line("continue")
+        else:
+            self._line("break")
+
+    def _line(self, line):
+        self.lines.append("    " * self.indent + line)
+
+    def _exit_with(self, condition, status_code, message):
+        self._line("if %s:" % condition)
+        self._line('    exit_program(StatusCode.%s, "%s")' % (status_code.name, message))
+
+    # Operands
+
+    def _frame(self, kind):
+        """Emit check of frame existence, get name of the frame"""
+        if kind == FrameKind.LOCAL:
+            self._exit_with("lf is None", StatusCode.MISSING_FRAME, "No frames in stack")
+            return "lf"
+        self._exit_with("tf is None", StatusCode.MISSING_FRAME, "No temporary frame")
+        return "tf"
+
+    def _place(self, arg):
+        """Get expression of variable storage"""
+        if arg.frame == FrameKind.GLOBAL:
+            return "g%d" % arg.slot
+        return "%s[%d]" % ("lf" if arg.frame == FrameKind.LOCAL else "tf", arg.slot)
+
+    def _target(self, arg):
+        """Emit check of destination variable, get expression to store to"""
+        place = self._place(arg)
+        if arg.frame == FrameKind.GLOBAL:
+            self.stored.append(arg.slot)
+            if arg.slot in self.defined:
+                return place
+            self.defined.add(arg.slot)
+            self._line("if %s is None:" % place)
+        else:
+            # Local and temporary frames grow only up to the highest slot they define
+            frame = self._frame(arg.frame)
+            self._line("if len(%s) <= %d or %s is None:" % (frame, arg.slot, place))
+        self._line("    missing(None)")
+        return place
+
+    def _operand(self, arg, index, initialized=True):
+        """Emit checks of operand, get expression of its value"""
+        if arg.type != DataType.VAR:
+            return _literal(arg.value)
+        if arg.frame == FrameKind.GLOBAL:
+            name = "g%d" % arg.slot
+            if arg.slot in (self.initialized if initialized else self.defined):
+                return name
+            self.defined.add(arg.slot)
+            if initialized:
+                self.initialized.add(arg.slot)
+        else:
+            frame = self._frame(arg.frame)
+            name = "x%d" % index
+            self._line("%s = %s if len(%s) > %d else None" % (
+                name, self._place(arg), frame, arg.slot))
+        if initialized:
+            self._line("if {0} is None or {0} is UNINITIALIZED:".format(name))
+        else:
+            self._line("if %s is None:" % name)
+        self._line("    missing(%s)" % name)
+        return name
+
+    def _operands(self, instruction):
+        return (self._target(instruction.args[0]),
+                self._operand(instruction.args[1], 1),
+                self._operand(instruction.args[2], 2))
+
+    def _check_types(self, args, expressions, python_types):
+        """Emit check of operand types, literals are checked at compile time"""
+        conditions = []
+        for (arg, expression, python_type) in zip(args, expressions, python_types):
+            if arg.type == DataType.VAR:
+                conditions.append("type(%s) is not %s" % (expression, python_type.__name__))
+            elif PYTHON_TYPES[arg.type] is not python_type:
+                self._line(INVALID_TYPE)
+                return
+        if conditions:
+            self._line("if %s:" % " or ".join(conditions))
+            self._line("    " + INVALID_TYPE)
+
+    # Emitters, they return True if control never continues to the next instruction
+
+    def _move(self, instruction, checked):
+        dst = self._target(instruction.args[0])
+        src = self._operand(instruction.args[1], 1)
+        self._line("%s = %s" % (dst, src))
+
+    def _create_frame(self, instruction, checked):
+        self._line("tf = []")
+
+    def _push_frame(self, instruction, checked):
+        self._frame(FrameKind.TEMPORARY)
+        self._line("frames.append(tf)")
+        self._line("lf = tf")
+        self._line("tf = None")
+
+    def _pop_frame(self, instruction, checked):
+        self._exit_with("not frames", StatusCode.MISSING_FRAME, "No frames in stack")
+        self._line("tf = frames.pop()")
+        self._line("lf = frames[-1] if frames else None")
+
+    def _defvar(self, instruction, checked):
+        arg = instruction.args[0]
+        place = self._place(arg)
+        if arg.frame != FrameKind.GLOBAL:
+            frame = self._frame(arg.frame)
+            self._line("if len(%s) <= %d:" % (frame, arg.slot))
+            self._line("    %s.extend([None] * (%d - len(%s)))" % (frame, arg.slot + 1, frame))
+            self._line("elif %s is not None:" % place)
+            self._line('    exit_program(StatusCode.SEMANTIC_ERROR, "Variable already exists")')
+        else:
+            self._exit_with("%s is not None" % place, StatusCode.SEMANTIC_ERROR,
+                            "Variable already exists")
+        self._line("%s = UNINITIALIZED" % place)
+        if arg.frame == FrameKind.GLOBAL:
+            self.defined.add(arg.slot)
+
+    def _call(self, instruction, checked):
+        self._line("calls.append(%d)" % (self.index + 1))
+        self._line("block = %d" % instruction.target)
+        self._line("continue")
+        return True
+
+    def _return(self, instruction, checked):
+        self._exit_with("not calls", StatusCode.MISSING_VALUE, "Stack is empty")
+        self._line("block = calls.pop()")
+        self._line("continue")
+        return True
+
+    def _pushs(self, instruction, checked):
+        src = self._operand(instruction.args[0], 0)
+        self._line("stack.append(%s)" % src)
+
+    def _pops(self, instruction, checked):
+        dst = self._target(instruction.args[0])
+        self._exit_with("not stack", StatusCode.MISSING_VALUE, "Stack is empty")
+        self._line("%s = stack.pop()" % dst)
+
+    def _arithmetic(self, instruction, checked):
+        (dst, a, b) = self._operands(instruction)
+        if checked:
+            self._check_types(instruction.args[1:], (a, b), (int, int))
+        if isinstance(instruction, ins.IDiv):
+            self._exit_with("%s == 0" % b, StatusCode.INVALID_VALUE, "Division by zero")
+        operator = {
+            ins.Add: "+",
+            ins.Sub: "-",
+            ins.Mul: "*",
+            ins.IDiv: "//",
+        }[CHECKED.get(type(instruction), type(instruction))]
+        self._line("%s = %s %s %s" % (dst, a, operator, b))
+
+    def _relational(self, instruction, checked):
+        (dst, a, b) = self._operands(instruction)
+        if checked:
+            self._check_ordered(instruction.args[1:], a, b)
+        operator = "<" if isinstance(instruction, ins.Lt) else ">"
+        self._line("%s = %s %s %s" % (dst, a, operator, b))
+
+    def _eq(self, instruction, checked):
+        (dst, a, b) = self._operands(instruction)
+        if checked:
+            self._check_comparable(instruction.args[1:], a, b)
+        self._line("%s = %s == %s" % (dst, a, b))
+
+    def _check_ordered(self, args, a, b):
+        """Emit check that operands are of the same type other than nil"""
+        (left, right) = args
+        if left.type == DataType.NIL or right.type == DataType.NIL:
+            self._line(INVALID_TYPE)
+            return
+        if left.type != DataType.VAR and right.type != DataType.VAR:
+            if left.type != right.type:
+                self._line(INVALID_TYPE)
+            return
+        if left.type != DataType.VAR:
+            condition = "type(%s) is not %s" % (b, PYTHON_TYPES[left.type].__name__)
+        elif right.type != DataType.VAR:
+            condition = "type(%s) is not %s" % (a, PYTHON_TYPES[right.type].__name__)
+        else:
+            condition = "type(%s) is not type(%s) or %s is NIL" % (a, b, a)
+        self._line("if %s:" % condition)
+        self._line("    " + INVALID_TYPE)
+
+    def _check_comparable(self, args, a, b):
+        """Emit check that operands are of the same type or one of them is nil"""
+        (left, right) = args
+        if left.type == DataType.NIL or right.type == DataType.NIL:
+            return
+        if left.type != DataType.VAR and right.type != DataType.VAR:
+            if left.type != right.type:
+                self._line(INVALID_TYPE)
+            return
+        if left.type != DataType.VAR:
+            condition = "type(%s) is not %s and %s is not NIL" % (
+                b, PYTHON_TYPES[left.type].__name__, b)
+        elif right.type != DataType.VAR:
+            condition = "type(%s) is not %s and %s is not NIL" % (
+                a, PYTHON_TYPES[right.type].__name__, a)
+        else:
+            condition = "type(%s) is not type(%s) and %s is not NIL and %s is not NIL" % (
+                a, b, a, b)
+        self._line("if %s:" % condition)
+        self._line("    " + INVALID_TYPE)
+
+    def _logical(self, instruction, checked):
+        (dst, a, b) = self._operands(instruction)
+        if checked:
+            self._check_types(instruction.args[1:], (a, b), (bool, bool))
+        operator = "and" if isinstance(instruction, ins.And) else "or"
+        self._line("%s = %s %s %s" % (dst, a, operator, b))
+
+    def _not(self, instruction, checked):
+        dst = self._target(instruction.args[0])
+        a = self._operand(instruction.args[1], 1)
+        if checked:
+            self._check_types(instruction.args[1:], (a,), (bool,))
+        self._line("%s = not %s" % (dst, a))
+
+    def _int2char(self, instruction, checked):
+        dst = self._target(instruction.args[0])
+        a = self._operand(instruction.args[1], 1)
+        self._check_types(instruction.args[1:], (a,), (int,))
+        self._line("try:")
+        self._line("    %s = chr(%s)" % (dst, a))
+        self._line("except ValueError:")
+        self._line('    exit_program(StatusCode.INVALID_STRING, "Invalid range of int")')
+
+    def _stri2int(self, instruction, checked):
+        (dst, a, b) = self._operands(instruction)
+        self._check_types(instruction.args[1:], (a, b), (str, int))
+        self._exit_with("%s < 0 or %s >= len(%s)" % (b, b, a),
+                        StatusCode.INVALID_STRING, "Invalid range of int")
+        self._line("%s = ord(%s[%s])" % (dst, a, b))
+
+    def _read(self, instruction, checked):
+        dst = self._target(instruction.args[0])
+        conversion = {
+            "int": "int(input_reader.read_line())",
+            "bool": 'input_reader.read_line().lower() == "true"',
+            "string": "input_reader.read_line()",
+        }[instruction.args[1].value]
+        # Prompts written so far have to be visible to the writer of input
+        self._line("if input_reader.interactive:")
+        self._line("    stdout.flush()")
+        self._line("try:")
+        self._line("    %s = %s" % (dst, conversion))
+        self._line("except (EOFError, ValueError):")
+        self._line("    %s = NIL" % dst)
+
+    def _write(self, instruction, checked):
+        arg = instruction.args[0]
+        if arg.type != DataType.VAR:
+            if arg.type == DataType.BOOL:
+                text = "true" if arg.value else "false"
+            elif arg.type == DataType.NIL:
+                text = ""
+            else:
+                text = str(arg.value)
+            if text:
+                self._line("write(%r)" % text)
+            return
+        a = self._operand(arg, 0)
+        self._line("if type(%s) is bool:" % a)
+        self._line('    write("true" if %s else "false")' % a)
+        self._line("elif %s is not NIL:" % a)
+        self._line("    write(str(%s))" % a)
+
+    def _concat(self, instruction, checked):
+        (dst, a, b) = self._operands(instruction)
+        if checked:
+            self._check_types(instruction.args[1:], (a, b), (str, str))
+        self._line("%s = %s + %s" % (dst, a, b))
+
+    def _strlen(self, instruction, checked):
+        dst = self._target(instruction.args[0])
+        a = self._operand(instruction.args[1], 1)
+        self._check_types(instruction.args[1:], (a,), (str,))
+        self._line("%s = len(%s)" % (dst, a))
+
+    def _getchar(self, instruction, checked):
+        (dst, a, b) = self._operands(instruction)
+        self._check_types(instruction.args[1:], (a, b), (str, int))
+        self._exit_with("%s < 0 or %s >= len(%s)" % (b, b, a),
+                        StatusCode.INVALID_STRING, "Invalid argument value")
+        self._line("%s = %s[%s]" % (dst, a, b))
+
+    def _setchar(self, instruction, checked):
+        args = instruction.args
+        (a, b, c) = (self._operand(args[0], 0), self._operand(args[1], 1),
+                     self._operand(args[2], 2))
+        self._check_types(args, (a, b, c), (str, int, str))
+        self._exit_with("%s < 0 or %s >= len(%s) or len(%s) == 0" % (b, b, a, c),
+                        StatusCode.INVALID_STRING, "Invalid argument value")
+        self._line("%s = %s[:%s] + %s[0] + %s[%s + 1:]" % (self._place(args[0]), a, b, c, a, b))
+
+    def _type(self, instruction, checked):
+        dst = self._target(instruction.args[0])
+        arg = instruction.args[1]
+        if arg.type != DataType.VAR:
+            self._line("%s = %r" % (dst, arg.type.name.lower()))
+            return
+        a = self._operand(arg, 1, initialized=False)
+        self._line('%s = TYPE_NAMES.get(type(%s), "")' % (dst, a))
+
+    def _label(self, instruction, checked):
+        # Labels are not executed
+        pass
+
+    def _jump(self, instruction, checked):
+        self._line("block = %d" % instruction.target)
+        self._line("continue")
+        return True
+
+    def _conditional_jump(self, instruction, checked):
+        a = self._operand(instruction.args[1], 1)
+        b = self._operand(instruction.args[2], 2)
+        if checked:
+            self._check_comparable(instruction.args[1:], a, b)
+        operator = "==" if isinstance(instruction, ins.JumpIfEq) else "!="
+        self._line("if %s %s %s:" % (a, operator, b))
+        self._line("    block = %d" % instruction.target)
+        self._line("    continue")
+
+    def _exit(self, instruction, checked):
+        a = self._operand(instruction.args[0], 0)
+        self._check_types(instruction.args, (a,), (int,))
+        self._exit_with("%s < 0 or %s > 49" % (a, a),
+                        StatusCode.INVALID_VALUE, "Invalid argument value")
+        self._line("stdout.flush()")
+        self._line("sys.exit(%s)" % a)
+        return True
+
+    def _dprint(self, instruction, checked):
+        arg = instruction.args[0]
+        name = arg.name if arg.type == DataType.VAR else None
+        a = self._operand(arg, 0, initialized=False)
+        self._line('print("*** DPRINT *** Name: {}, Type: {}, Value: {}".format('
+                   '%r, type_of(%s), %s), file=sys.stderr)' % (name, a, a))
+
+    def _break(self, instruction, checked):
+        self._line('print("*** BREAK *** IP: %d", file=sys.stderr)' % instruction.position)
+
+
+def load_module(path):
+    """Load module generated by the compiler"""
+    loader = SourceFileLoader("ippcode23_program", path)
+    module = module_from_spec(spec_from_loader(loader.name, loader))
+    try:
+        loader.exec_module(module)
+    except OSError:
+        exit_program(StatusCode.INPUT_ERROR, "Input error")
+    return module
+
+
+def _unwrap(instruction):
+    """Get instruction to compile in place of a superinstruction
+
+    The second instruction of a pair keeps its own index, so only the first
+    one has to be compiled in place of the pair.
+    """
+    if isinstance(instruction, ins.Superinstruction):
+        return instruction.first
+    return instruction
+
+
+def _literal(value):
+    """Get Python expression of literal value"""
+    if value is NIL:
+        return "NIL"
+    return repr(value)
+
+
+def _describe(instruction):
+    """Get instruction as text for comments in generated code"""
+    args = []
+    for arg in instruction.args:
+        if arg.type == DataType.VAR:
+            args.append("%s@%s" % (("GF", "LF", "TF")[arg.frame], arg.name))
+        elif arg.type in PYTHON_TYPES:
+            args.append("%s@%s" % (arg.type.name.lower(), _literal(arg.value)))
+        else:
+            args.append(arg.value)
+    return " ".join([instruction.opcode] + args)
@@ -0,0 +1,124 @@
+"""Instruction coverage"""
+
+import hashlib
+import struct
+from error import StatusCode, exit_program
+
+# Header of coverage files: magic, digest of instruction orders, number of
+# instructions and length of the source name which follows the header
+MAGIC = b"IPPCOV\x00\x01"
+HEADER = struct.Struct("<8s20sIH")
+
+
+class CoverageMap:
+    """Bitmap of executed instructions of one source
+
+    Bit i is set when the i-th instruction of the program, sorted by order,
+    was executed. Maps of the same source are identified by its name and by
+    the digest of the orders of its instructions.
+    """
+
+    def __init__(self, source, digest, count, bits=None):
+        self.source = source
+        self.digest = digest
+        self.count = count
+        self.bits = bytearray((count + 7) >> 3) if bits is None else bits
+
+    @staticmethod
+    def for_program(source, instructions):
+        """Create empty map of program instructions"""
+        return CoverageMap(source, order_digest(
+            [instruction.order for instruction in instructions]), len(instructions))
+
+    def covered(self, index):
+        """Check whether the index-th instruction was executed"""
+        return bool(self.bits[index >> 3] & (1 << (index & 7)))
+
+    def merge(self, other):
+        """Add executed instructions of other map of the same source"""
+        self.bits = bytearray(a | b for (a, b) in zip(self.bits, other.bits))
+
+    def key(self):
+        """Get key identifying the source and its version"""
+        return (self.source, self.digest)
+
+    def write(self, file):
+        """Write map to binary file"""
+        source = self.source.encode("utf-8")
+        file.write(HEADER.pack(MAGIC, self.digest, self.count, len(source)))
+        file.write(source)
+        file.write(self.bits)
+
+    @staticmethod
+    def read(file):
+        """Read all maps from binary file, merged files contain more of them"""
+        maps = []
+        while True:
+            header = file.read(HEADER.size)
+            if not header:
+                return maps
+            if len(header) != HEADER.size:
+                raise ValueError("Truncated coverage file")
+            (magic, digest, count, length) = HEADER.unpack(header)
+            if magic != MAGIC:
+                raise ValueError("Not a coverage file")
+            source = file.read(length)
+            bits = bytearray(file.read((count + 7) >> 3))
+            if len(source) != length or len(bits) != (count + 7) >> 3:
+                raise ValueError("Truncated coverage file")
+            maps.append(CoverageMap(source.decode("utf-8"), digest, count, bits))
+
+
+class CoverageEngine:
+    """Execution engine marking executed instructions in a coverage map
+
+    Every instruction is replaced by a probe, which sets its bit and puts
+    the instruction back on its first execution. Later executions are not
+    slowed down at all. The map is written when the program ends, also
+    when it ends by EXIT or by an error.
+    """
+
+    def __init__(self, runner, source, path):
+        self.runner = runner
+        self.path = path
+        self.map = CoverageMap.for_program(source, runner.instructions)
+        instructions = runner.instructions
+        for (ip, instruction) in enumerate(instructions):
+            instructions[ip] = _Probe(self.map.bits, instructions, ip, instruction)
+
+    def run(self):
+        """Run the code"""
+        try:
+            self.runner.run()
+        finally:
+            self._write()
+
+    def _write(self):
+        try:
+            with open(self.path, "wb") as file:
+                self.map.write(file)
+        except OSError:
+            exit_program(StatusCode.OUTPUT_ERROR, "Output error")
+
+
+class _Probe:
+    """Stand-in of instruction executed for the first time"""
+
+    __slots__ = ("bits", "instructions", "ip", "instruction")
+
+    def __init__(self, bits, instructions, ip, instruction):
+        self.bits = bits
+        self.instructions = instructions
+        self.ip = ip
+        self.instruction = instruction
+
+    def execute(self):
+        """Mark instruction as executed and execute it"""
+        self.bits[self.ip >> 3] |= 1 << (self.ip & 7)
+        self.instructions[self.ip] = self.instruction
+        self.instruction.execute()
+
+
+def order_digest(orders):
+    """Get digest of sorted orders of instructions"""
+    return hashlib.sha1(",".join(str(order) for order in orders).encode("ascii")).digest()
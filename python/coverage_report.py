@@ -0,0 +1,99 @@
+"""
+Merge coverage maps written by interpret.py --coverage and report
+instructions which were never executed
+"""
+
+import sys
+import xml.etree.ElementTree as ET
+from arguments import Parser
+from coverage_map import CoverageMap, order_digest
+from error import StatusCode, exit_program
+from validate import ValidationError, validate_root, validate_instruction
+
+
+def merge(paths):
+    """Read and merge coverage files, keyed by source and its version"""
+    merged = {}
+    for path in paths:
+        try:
+            with open(path, "rb") as file:
+                maps = CoverageMap.read(file)
+        except OSError:
+            exit_program(StatusCode.INPUT_ERROR, "Input error")
+        except ValueError as error:
+            exit_program(StatusCode.INPUT_ERROR, "{}: {}".format(path, error))
+        for coverage in maps:
+            if coverage.key() in merged:
+                merged[coverage.key()].merge(coverage)
+            else:
+                merged[coverage.key()] = coverage
+    return merged
+
+
+def report(coverage, file):
+    """Print uncovered orders and labels of source of coverage map"""
+    covered = sum(1 for index in range(coverage.count) if coverage.covered(index))
+    print("{}: {}/{} instructions covered".format(
+        coverage.source, covered, coverage.count), file=file)
+    try:
+        instructions = load_instructions(coverage.source)
+    except OSError:
+        print("  source is not available", file=file)
+        return
+    except ET.ParseError as error:
+        print("  source is not valid: {}".format(error), file=file)
+        return
+    except ValidationError as error:
+        print("  source is not valid: {}".format(error), file=file)
+        return
+    if order_digest([order for (order, _, _) in instructions]) != coverage.digest:
+        print("  source has changed since the coverage was collected", file=file)
+        return
+    uncovered = [instruction for (index, instruction) in enumerate(instructions)
+                 if not coverage.covered(index)]
+    if uncovered:
+        print("  uncovered orders: " + ", ".join(
+            str(order) for (order, _, _) in uncovered), file=file)
+    labels = [arguments[0][1] for (_, opcode, arguments) in uncovered
+              if opcode == "LABEL"]
+    if labels:
+        print("  uncovered labels: " + ", ".join(labels), file=file)
+
+
+def load_instructions(path):
+    """Get (order, opcode, arguments) of instructions of source sorted by order
+
+    Unlike Program, the source is only validated, and errors are raised
+    instead of ending the tool.
+    """
+    root = ET.parse(path).getroot()
+    validate_root(root)
+    (labels, orders) = (set(), set())
+    instructions = []
+    for element in root:
+        (opcode, order, arguments) = validate_instruction(element, labels, orders)
+        instructions.append((order, opcode, arguments))
+    return sorted(instructions)
+
+
+if __name__ == "__main__":
+    parser = Parser(description="Merge coverage files and report uncovered instructions")
+    parser.add_argument("files", nargs="+", metavar="FILE",
+                        help="coverage file written by --coverage or by this tool")
+    parser.add_argument("-o", "--output", metavar="FILE",
+                        help="write merged coverage to a file")
+    parser.add_argument("-q", "--quiet", action="store_true",
+                        help="do not print the report")
+    args = parser.parse_args()
+
+    merged = merge(args.files)
+    if args.output is not None:
+        try:
+            with open(args.output, "wb") as file:
+                for coverage in merged.values():
+                    coverage.write(file)
+        except OSError:
+            exit_program(StatusCode.OUTPUT_ERROR, "Output error")
+    if not args.quiet:
+        for key in sorted(merged):
+            report(merged[key], sys.stdout)
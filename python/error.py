@@ -2,6 +2,7 @@
 
 from enum import Enum
 import sys
+from output import stdout
 
 
 class StatusCode(Enum):
@@ -24,5 +25,6 @@ class StatusCode(Enum):
 
 def exit_program(status_code, message):
     """Exit program with given status code and message"""
+    stdout.flush()
     print(message, file=sys.stderr)
     exit(status_code.value)
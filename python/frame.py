@@ -1,45 +1,92 @@
 """Frames and frame manager"""
 
 from error import StatusCode, exit_program
-from variable import Variable
+from value import UNINITIALIZED
+
+
+class FrameKind:
+    """Frame kinds used by decoded variable operands"""
+    GLOBAL = 0
+    LOCAL = 1
+    TEMPORARY = 2
+
+    @staticmethod
+    def from_string(string):
+        """Convert frame prefix to frame kind"""
+        if string == "GF":
+            return FrameKind.GLOBAL
+        elif string == "LF":
+            return FrameKind.LOCAL
+        elif string == "TF":
+            return FrameKind.TEMPORARY
+        else:
+            exit_program(StatusCode.MALLFORMED, "Invalid frame")
+
+
+class FrameLayout:
+    """Assignment of variable names to frame slots"""
+
+    def __init__(self):
+        self.slots = {}
+        self.names = []
+
+    def slot(self, name):
+        """Get slot of variable, assigning a new one if needed"""
+        if name not in self.slots:
+            self.slots[name] = len(self.names)
+            self.names.append(name)
+        return self.slots[name]
 
 
 class FrameManager:
     """Variable frame manager"""
 
-    def __init__(self):
+    def __init__(self, global_layout):
         self.temporary_frame = None
-        self.global_frame = Frame()
+        # Top of the local frame stack, kept in sync by the frame stack
+        self.local_frame = None
+        self.global_frame = Frame(len(global_layout.names))
         self.local_frames = FrameStack(self)
+        # Frame accessors indexed by frame kind
+        self._accessors = (self._get_global_frame,
+                           self._get_local_frame,
+                           self._get_temporary_frame)
+
+    def create_frame(self):
+        """Create new temporary frame"""
+        self.temporary_frame = Frame()
+
+    def get_variable(self, kind, slot):
+        """Get variable value"""
+        return self._accessors[kind]().get_variable(slot)
 
-    def get_variable(self, var):
-        """Get variable"""
-        (frame, name) = var.split("@")
-        if frame == "GF":
-            return self.global_frame.get_variable(name)
-        elif frame == "LF":
-            return self.local_frames.top_frame().get_variable(name)
-        elif frame == "TF":
-            if self.temporary_frame is None:
-                exit_program(StatusCode.MISSING_FRAME, "No temporary frame")
-            return self.temporary_frame.get_variable(name)
-
-    def create_variable(self, var):
+    def set_variable(self, kind, slot, value):
+        """Set variable value"""
+        self._accessors[kind]().set_variable(slot, value)
+
+    def create_variable(self, kind, slot):
         """Create variable"""
-        (frame, name) = var.split("@")
-        if frame == "GF":
-            self.global_frame.create_variable(name)
-        elif frame == "LF":
-            self.local_frames.top_frame().create_variable(name)
-        elif frame == "TF":
-            if self.temporary_frame is None:
-                exit_program(StatusCode.MISSING_FRAME, "No temporary frame")
-            self.temporary_frame.create_variable(name)
+        self._accessors[kind]().create_variable(slot)
+
+    def _get_global_frame(self):
+        return self.global_frame
+
+    def _get_local_frame(self):
+        if self.local_frame is None:
+            exit_program(StatusCode.MISSING_FRAME, "No frames in stack")
+        return self.local_frame
+
+    def _get_temporary_frame(self):
+        if self.temporary_frame is None:
+            exit_program(StatusCode.MISSING_FRAME, "No temporary frame")
+        return self.temporary_frame
 
 
 class FrameStack:
     """Variable frame stack"""
 
+    __slots__ = ("frames", "manager")
+
     def __init__(self, manager):
         self.frames = []
         self.manager = manager
@@ -49,6 +96,7 @@ class FrameStack:
         if self.manager.temporary_frame is None:
             exit_program(StatusCode.MISSING_FRAME, "No temporary frame")
         self.frames.append(self.manager.temporary_frame)
+        self.manager.local_frame = self.manager.temporary_frame
         self.manager.temporary_frame = None
 
     def pop_frame(self):
@@ -57,6 +105,7 @@ class FrameStack:
             exit_program(StatusCode.MISSING_FRAME, "No frames in stack")
         else:
             self.manager.temporary_frame = self.frames.pop()
+            self.manager.local_frame = self.frames[-1] if self.frames else None
 
     def top_frame(self):
         """Get top frame"""
@@ -67,25 +116,43 @@ class FrameStack:
 
 
 class Frame:
-    """Variable frame"""
+    """Variable frame with values stored in slots
 
-    def __init__(self):
-        self._variables = {}
+    Slot of a variable which is not defined holds None. Temporary and local
+    frames start empty and grow up to the highest slot they define, so they
+    do not pay for names of the rest of the program.
+    """
+
+    __slots__ = ("_variables",)
+
+    def __init__(self, size=0):
+        self._variables = [None] * size
 
     def clear(self):
         """Clear frame"""
-        self._variables = {}
+        self._variables = [None] * len(self._variables)
+
+    def get_variable(self, slot):
+        """Get variable value"""
+        try:
+            value = self._variables[slot]
+        except IndexError:
+            value = None
+        if value is None:
+            exit_program(StatusCode.MISSING_VAR, "Variable not found")
+        return value
 
-    def get_variable(self, name):
-        """Get variable"""
-        if name in self._variables:
-            return self._variables[name]
-        else:
+    def set_variable(self, slot, value):
+        """Set variable value"""
+        if slot >= len(self._variables) or self._variables[slot] is None:
             exit_program(StatusCode.MISSING_VAR, "Variable not found")
+        self._variables[slot] = value
 
-    def create_variable(self, name):
+    def create_variable(self, slot):
         """Create variable"""
-        if name in self._variables:
+        variables = self._variables
+        if slot >= len(variables):
+            variables.extend([None] * (slot + 1 - len(variables)))
+        elif variables[slot] is not None:
             exit_program(StatusCode.SEMANTIC_ERROR, "Variable already exists")
-        else:
-            self._variables[name] = Variable(name)
+        variables[slot] = UNINITIALIZED
@@ -0,0 +1,128 @@
+"""Execution hooks"""
+
+from error import StatusCode
+from output import stdout
+import instructions as ins
+
+# Events raised by instructions after they are executed
+CALL = 1
+RETURN = 2
+FRAME_PUSH = 3
+FRAME_POP = 4
+
+# Values of EXIT ending the program without an error
+EXIT_CODES = range(50)
+
+
+class Hook:
+    """Base of execution hooks
+
+    Hooks are registered by Runner.add_hook and called by the runner while
+    the program runs. Only methods overridden by a hook are called, all of
+    them get the runner as their first argument.
+    """
+
+    def on_instruction(self, runner, ip, instruction):
+        """Called before instruction at index ip is executed"""
+
+    def on_call(self, runner, ip, target):
+        """Called after CALL at index ip jumped to target"""
+
+    def on_return(self, runner, ip, target):
+        """Called after RETURN at index ip returned to target"""
+
+    def on_frame_push(self, runner, frame):
+        """Called after frame was pushed to the local frame stack"""
+
+    def on_frame_pop(self, runner, frame):
+        """Called after frame was popped to the temporary frame"""
+
+    def on_error(self, runner, ip, status):
+        """Called when instruction at index ip ended the program with error status"""
+
+    def on_end(self, runner, status):
+        """Called when the program ends for any reason, with its exit status
+
+        Runs ended by an exception other than SystemExit, such as a crash
+        or an interrupt, end with the INTERNAL_ERROR status.
+        """
+
+
+def run_hooked(runner):
+    """Run the code calling hooks registered on runner
+
+    This is a separate copy of the dispatch loop, so the runner pays for
+    hooks only when there are any.
+    """
+    instructions = runner.instructions
+    frames = runner.frames
+    on_instruction = _methods(runner.hooks, "on_instruction")
+    on_call = _methods(runner.hooks, "on_call")
+    on_return = _methods(runner.hooks, "on_return")
+    on_frame_push = _methods(runner.hooks, "on_frame_push")
+    on_frame_pop = _methods(runner.hooks, "on_frame_pop")
+    handled = {CALL: on_call, RETURN: on_return,
+               FRAME_PUSH: on_frame_push, FRAME_POP: on_frame_pop}
+    # Events of instructions, only of those having any handlers
+    events = [_event(instruction) for instruction in instructions]
+    events = [event if event and handled[event] else None for event in events]
+    end = len(instructions)
+    ip = 0
+    status = 0
+    try:
+        while ip < end:
+            runner.instruction_pointer = ip
+            runner.next_ip = ip + 1
+            instruction = instructions[ip]
+            for method in on_instruction:
+                method(runner, ip, instruction)
+            instruction.execute()
+            event = events[ip]
+            if event is not None:
+                if event == CALL:
+                    for method in on_call:
+                        method(runner, ip, runner.next_ip)
+                elif event == RETURN:
+                    for method in on_return:
+                        method(runner, ip, runner.next_ip)
+                elif event == FRAME_PUSH:
+                    for method in on_frame_push:
+                        method(runner, frames.local_frame)
+                else:
+                    for method in on_frame_pop:
+                        method(runner, frames.temporary_frame)
+            ip = runner.next_ip
+        runner.done = True
+        stdout.flush()
+    except SystemExit as exit_:
+        status = exit_.code
+        exited = ip < end and isinstance(instructions[ip], ins.Exit)
+        if not (exited and status in EXIT_CODES):
+            for method in _methods(runner.hooks, "on_error"):
+                method(runner, ip, status)
+        raise
+    except BaseException:
+        # Crashed or interrupted run did not succeed either
+        status = StatusCode.INTERNAL_ERROR.value
+        raise
+    finally:
+        for method in _methods(runner.hooks, "on_end"):
+            method(runner, status)
+
+
+def _methods(hooks, name):
+    """Get bound methods of hooks overriding the given one"""
+    return [getattr(hook, name) for hook in hooks
+            if getattr(type(hook), name) is not getattr(Hook, name)]
+
+
+def _event(instruction):
+    if isinstance(instruction, ins.Call):
+        return CALL
+    if isinstance(instruction, ins.Return):
+        return RETURN
+    if isinstance(instruction, (ins.PushFrame, ins.CreatePushFrame)):
+        return FRAME_PUSH
+    if isinstance(instruction, ins.PopFrame):
+        return FRAME_POP
+    return None
@@ -0,0 +1,169 @@
+"""Static type inference"""
+
+from value import DataType
+from frame import FrameKind
+from cfg import ControlFlowGraph
+import instructions as ins
+
+# Instructions writing a value of known type to their first operand
+RESULT_TYPES = {
+    ins.Add: DataType.INT,
+    ins.Sub: DataType.INT,
+    ins.Mul: DataType.INT,
+    ins.IDiv: DataType.INT,
+    ins.Lt: DataType.BOOL,
+    ins.Gt: DataType.BOOL,
+    ins.Eq: DataType.BOOL,
+    ins.And: DataType.BOOL,
+    ins.Or: DataType.BOOL,
+    ins.Not: DataType.BOOL,
+    ins.Int2Char: DataType.STRING,
+    ins.Stri2Int: DataType.INT,
+    ins.Concat: DataType.STRING,
+    ins.StrLen: DataType.INT,
+    ins.GetChar: DataType.STRING,
+    ins.SetChar: DataType.STRING,
+    ins.Type: DataType.STRING,
+}
+
+# Checked instructions and their variants without type checks
+UNCHECKED = {
+    ins.Add: ins.UncheckedAdd,
+    ins.Sub: ins.UncheckedSub,
+    ins.Mul: ins.UncheckedMul,
+    ins.IDiv: ins.UncheckedIDiv,
+    ins.Lt: ins.UncheckedLt,
+    ins.Gt: ins.UncheckedGt,
+    ins.Eq: ins.UncheckedEq,
+    ins.And: ins.UncheckedAnd,
+    ins.Or: ins.UncheckedOr,
+    ins.Not: ins.UncheckedNot,
+    ins.Concat: ins.UncheckedConcat,
+    ins.JumpIfEq: ins.UncheckedJumpIfEq,
+    ins.JumpIfNeq: ins.UncheckedJumpIfNeq,
+}
+
+
+def specialize_types(instructions):
+    """Replace instructions whose operand types are proven by unchecked variants
+
+    Types of variables are tracked per basic block and merged where control
+    flow joins. Nothing is assumed at the program start, at CALL targets and
+    after CALL, where the callee could have changed anything.
+    """
+    graph = ControlFlowGraph(instructions)
+    states = _infer(graph)
+    specialized = list(instructions)
+    for block in graph.blocks:
+        state = states.get(block.start)
+        if state is None:
+            continue
+        state = dict(state)
+        for index in range(block.start, block.end):
+            instruction = instructions[index]
+            if type(instruction) in UNCHECKED and _proven(instruction, state):
+                specialized[index] = _unchecked(instruction)
+            _transfer(instruction, state)
+    return specialized
+
+
+def _infer(graph):
+    """Get variable types known at the start of every block"""
+    unknown = set()
+    if graph.blocks:
+        unknown.add(0)
+    for block in graph.blocks:
+        last = graph.instructions[block.end - 1]
+        if isinstance(last, ins.Call):
+            unknown.add(graph.labels[last.args[0].value])
+            unknown.add(block.end)
+    states = {start: {} for start in unknown}
+    pending = [graph.block_at[start] for start in unknown if start in graph.block_at]
+    while pending:
+        block = pending.pop()
+        state = dict(states[block.start])
+        for index in range(block.start, block.end):
+            _transfer(graph.instructions[index], state)
+        for successor in block.successors:
+            if successor.start in unknown:
+                continue
+            previous = states.get(successor.start)
+            if previous is None:
+                merged = dict(state)
+            else:
+                merged = {key: value for (key, value) in previous.items()
+                          if state.get(key) == value}
+            if merged != previous:
+                states[successor.start] = merged
+                pending.append(successor)
+    return states
+
+
+def _transfer(instruction, state):
+    """Update known variable types by effect of instruction"""
+    if isinstance(instruction, ins.CreateFrame):
+        _drop_frame(state, FrameKind.TEMPORARY)
+    elif isinstance(instruction, ins.PushFrame):
+        _drop_frame(state, FrameKind.LOCAL)
+        _move_frame(state, FrameKind.TEMPORARY, FrameKind.LOCAL)
+    elif isinstance(instruction, ins.PopFrame):
+        _drop_frame(state, FrameKind.TEMPORARY)
+        _move_frame(state, FrameKind.LOCAL, FrameKind.TEMPORARY)
+    elif isinstance(instruction, ins.Move):
+        result = _type_of(instruction.args[1], state)
+        _set(state, instruction.args[0], result)
+    elif type(instruction) in RESULT_TYPES:
+        _set(state, instruction.args[0], RESULT_TYPES[type(instruction)])
+    elif isinstance(instruction, (ins.DefVar, ins.Read, ins.PopS)):
+        _set(state, instruction.args[0], None)
+
+
+def _proven(instruction, state):
+    """Check whether type checks of instruction can never fail"""
+    types = [_type_of(arg, state) for arg in instruction.args[1:]]
+    if None in types:
+        return False
+    if isinstance(instruction, (ins.Add, ins.Sub, ins.Mul, ins.IDiv)):
+        return types == [DataType.INT, DataType.INT]
+    if isinstance(instruction, (ins.Lt, ins.Gt)):
+        return types[0] == types[1] and types[0] != DataType.NIL
+    if isinstance(instruction, (ins.Eq, ins.JumpIfEq, ins.JumpIfNeq)):
+        return types[0] == types[1] or DataType.NIL in types
+    if isinstance(instruction, (ins.And, ins.Or)):
+        return types == [DataType.BOOL, DataType.BOOL]
+    if isinstance(instruction, ins.Not):
+        return types == [DataType.BOOL]
+    if isinstance(instruction, ins.Concat):
+        return types == [DataType.STRING, DataType.STRING]
+    return False
+
+
+def _unchecked(instruction):
+    specialized = UNCHECKED[type(instruction)](
+        instruction.opcode, instruction.order, instruction.args)
+    specialized.target = instruction.target
+    return specialized
+
+
+def _type_of(arg, state):
+    if arg.type == DataType.VAR:
+        return state.get((arg.frame, arg.name))
+    return arg.type
+
+
+def _set(state, arg, data_type):
+    key = (arg.frame, arg.name)
+    if data_type is None:
+        state.pop(key, None)
+    else:
+        state[key] = data_type
+
+
+def _drop_frame(state, kind):
+    for key in [key for key in state if key[0] == kind]:
+        del state[key]
+
+
+def _move_frame(state, source, destination):
+    for key in [key for key in state if key[0] == source]:
+        state[(destination, key[1])] = state.pop(key)
@@ -1,97 +1,139 @@
 """Instruction foundation"""
 
-from enum import Enum
-import re
-from variable import Variable
+from validate import LazyPattern
+from value import DataType, NIL, UNINITIALIZED
+from frame import FrameKind
 from error import exit_program, StatusCode
 
 
-class DataType(Enum):
-    """Variable types"""
-    INT = 1
-    STRING = 2
-    BOOL = 3
-    NIL = 4
-    LABEL = 5
-    TYPE = 6
-    VAR = 7
-
-    @staticmethod
-    def from_string(string):
-        """Convert string to type"""
-        if string == "int":
-            return DataType.INT
-        elif string == "bool":
-            return DataType.BOOL
-        elif string == "string":
-            return DataType.STRING
-        elif string == "nil":
-            return DataType.NIL
-        elif string == "label":
-            return DataType.LABEL
-        elif string == "type":
-            return DataType.TYPE
-        elif string == "var":
-            return DataType.VAR
-        else:
-            exit_program(StatusCode.MALLFORMED, "Invalid argument type")
+# Escape sequence in string literal
+ESCAPE_RE = LazyPattern(r"\\\d{3}")
 
 
 class Argument:
-    """Instruction argument"""
+    """Instruction argument decoded from validated type and text"""
 
-    def __init__(self, xml):
-        self.type = DataType.from_string(xml.attrib['type'])
-        self.value = xml.text
-        if self.value is not None:
-            self.value = self.value.strip()
+    # Variables use name, frame and slot, literals use index
+    __slots__ = ("type", "value", "name", "frame", "slot", "index")
+
+    def __init__(self, arg_type, text):
+        self.type = DataType.from_string(arg_type)
+        self.value = text
         if self.type == DataType.INT:
-            self.value = self.value.lower()
             # Remove underscores, o
-            self.value = re.sub(r"[_o]", "", self.value)
+            value = text.lower().replace("_", "").replace("o", "")
+            digits = value.lstrip("+-")
             # Hex
-            if re.match(r"^[+-]?0x", self.value):
-                self.value = int(self.value, 16)
+            if digits.startswith("0x"):
+                self.value = int(value, 16)
             # Octal
-            elif re.match(r"^[+-]?0", self.value):
-                self.value = int(self.value, 8)
+            elif digits.startswith("0"):
+                self.value = int(value, 8)
             # Decimal
             else:
-                self.value = int(self.value, 10)
+                self.value = int(value, 10)
         elif self.type == DataType.STRING:
-            if self.value is None:
+            if text is None:
                 self.value = ""
-            else:
-                self.value = re.sub(r"\\\d{3}",
-                                    lambda x: chr(int(x.group(0)[1:])), self.value)
+            elif "\\" in text:
+                self.value = ESCAPE_RE.sub(
+                    lambda x: chr(int(x.group(0)[1:])), text)
         elif self.type == DataType.BOOL:
-            self.value = self.value == "true"
+            self.value = text == "true"
+        elif self.type == DataType.NIL:
+            self.value = NIL
+        elif self.type == DataType.VAR:
+            # Decode variable once into frame kind and name
+            (frame, self.name) = text.split("@", 1)
+            self.frame = FrameKind.from_string(frame)
+            # Frame slot, assigned by the program
+            self.slot = None
+
+    @classmethod
+    def literal(cls, data_type, value):
+        """Create literal argument from already decoded value"""
+        argument = cls.__new__(cls)
+        argument.type = data_type
+        argument.value = value
+        return argument
+
+
+class ConstantPool:
+    """Arguments of a program, each distinct one decoded only once
+
+    Instructions share argument objects, so a literal used many times is
+    stored only once. Decoded literal values are also kept in a list and
+    every literal argument knows its index there.
+    """
+
+    # Types of arguments whose values end up in the list
+    CONSTANT_TYPES = (DataType.INT, DataType.STRING, DataType.BOOL, DataType.NIL)
+
+    def __init__(self):
+        self.values = []
+        # Arguments by their source text and literals by their value
+        self._by_text = {}
+        self._by_value = {}
+
+    def argument(self, arg_type, text):
+        """Get argument for validated type and text"""
+        key = (arg_type, text)
+        argument = self._by_text.get(key)
+        if argument is None:
+            argument = Argument(arg_type, text)
+            if argument.type in self.CONSTANT_TYPES:
+                # Different spellings of the same value, e.g. int@0x10 and int@16
+                argument = self.literal(argument.type, argument.value)
+            self._by_text[key] = argument
+        return argument
+
+    def literal(self, data_type, value):
+        """Get literal argument for already decoded value"""
+        key = (data_type, value)
+        argument = self._by_value.get(key)
+        if argument is None:
+            argument = Argument.literal(data_type, value)
+            argument.index = len(self.values)
+            self.values.append(value)
+            self._by_value[key] = argument
+        return argument
 
 
 class BaseInstruction:
-    """Base instruction"""
+    """Base instruction
+
+    Instructions (and all their subclasses) are slotted, so a program
+    with millions of instructions does not carry a dict for each one.
+    """
+
+    __slots__ = ("runner", "order", "args", "opcode", "target")
 
-    def __init__(self, xml, runner):
+    def __init__(self, opcode, order, args):
+        # Runner executing the instruction, bound by the runner
+        self.runner = None
+        self.order = order
+        self.args = args
+        self.opcode = opcode
+        # Index of the jump target, resolved by the program
+        self.target = None
+
+    def bind(self, runner):
+        """Bind instruction to runner executing it"""
         self.runner = runner
-        self.order = int(xml.attrib['order'])
-        self.args = []
-        if xml.find('arg1') is not None:
-            self.args.append(Argument(xml.find('arg1')))
-        if xml.find('arg2') is not None:
-            self.args.append(Argument(xml.find('arg2')))
-        if xml.find('arg3') is not None:
-            self.args.append(Argument(xml.find('arg3')))
-        self.opcode = xml.attrib['opcode']
 
     def _evaluate_args(self, must_be_initialized=None):
         evaluated = []
         for index, arg in enumerate(self.args):
-            var = None
+            value = arg.value
             if arg.type == DataType.VAR:
-                var = self.runner.frames.get_variable(arg.value)
-            else:
-                var = Variable(None, arg.type, arg.value)
-            if must_be_initialized is not None and index in must_be_initialized:
-                var.check_initialized()
-            evaluated.append(var)
+                value = self.runner.frames.get_variable(arg.frame, arg.slot)
+                if (must_be_initialized is not None and index in must_be_initialized
+                        and value is UNINITIALIZED):
+                    exit_program(StatusCode.MISSING_VALUE,
+                                 "Variable is not initialized")
+            evaluated.append(value)
         return evaluated
+
+    def _store(self, value):
+        """Store value to variable in first argument"""
+        self.runner.frames.set_variable(self.args[0].frame, self.args[0].slot, value)
@@ -1,76 +1,45 @@
 """Implementation of all instructions"""
 
 import sys
-import copy
-from instruction import BaseInstruction, DataType
+from instruction import BaseInstruction
+from value import DataType, NIL, type_of
 from error import exit_program, StatusCode
-from frame import Frame
-
-
-def instruction_factory(xml, runner):
-    """Instruction factory"""
-    classes = {
-        "MOVE": Move,
-        "CREATEFRAME": CreateFrame,
-        "PUSHFRAME": PushFrame,
-        "POPFRAME": PopFrame,
-        "DEFVAR": DefVar,
-        "CALL": Call,
-        "RETURN": Return,
-        "PUSHS": PushS,
-        "POPS": PopS,
-        "ADD": Add,
-        "SUB": Sub,
-        "MUL": Mul,
-        "IDIV": IDiv,
-        "LT": Lt,
-        "GT": Gt,
-        "EQ": Eq,
-        "AND": And,
-        "OR": Or,
-        "NOT": Not,
-        "INT2CHAR": Int2Char,
-        "STRI2INT": Stri2Int,
-        "READ": Read,
-        "WRITE": Write,
-        "CONCAT": Concat,
-        "STRLEN": StrLen,
-        "GETCHAR": GetChar,
-        "SETCHAR": SetChar,
-        "TYPE": Type,
-        "LABEL": Label,
-        "JUMP": Jump,
-        "JUMPIFEQ": JumpIfEq,
-        "JUMPIFNEQ": JumpIfNeq,
-        "EXIT": Exit,
-        "DPRINT": DPrint,
-        "BREAK": Break
-    }
+from output import stdout
 
+
+def instruction_factory(opcode, order, arguments, constants):
+    """Instruction factory, sharing arguments through the constant pool"""
     # Return corresponding instruction instance
-    return classes[xml.attrib['opcode'].upper()](xml, runner)
+    args = tuple(constants.argument(arg_type, text) for (arg_type, text) in arguments)
+    return CLASSES[opcode](sys.intern(opcode), order, args)
 
 
 class Move(BaseInstruction):
     """MOVE <var> <symb>"""
 
+    __slots__ = ()
+
     def execute(self):
         """Execute instruction"""
         evaled = self._evaluate_args([1])
-        evaled[0].set(evaled[1])
+        self._store(evaled[1])
 
 
 class CreateFrame(BaseInstruction):
     """CREATEFRAME"""
 
+    __slots__ = ()
+
     def execute(self):
         """Execute instruction"""
-        self.runner.frames.temporary_frame = Frame()
+        self.runner.frames.create_frame()
 
 
 class PushFrame(BaseInstruction):
     """PUSHFRAME"""
 
+    __slots__ = ()
+
     def execute(self):
         """Execute instruction"""
         self.runner.frames.local_frames.push_frame()
@@ -79,6 +48,8 @@ class PushFrame(BaseInstruction):
 class PopFrame(BaseInstruction):
     """POPFRAME"""
 
+    __slots__ = ()
+
     def execute(self):
         """Execute instruction"""
         self.runner.frames.local_frames.pop_frame()
@@ -87,23 +58,29 @@ class PopFrame(BaseInstruction):
 class DefVar(BaseInstruction):
     """DEFVAR <var>"""
 
+    __slots__ = ()
+
     def execute(self):
         """Execute instruction"""
-        self.runner.frames.create_variable(self.args[0].value)
+        self.runner.frames.create_variable(self.args[0].frame, self.args[0].slot)
 
 
 class Call(BaseInstruction):
     """CALL <label>"""
 
+    __slots__ = ()
+
     def execute(self):
         """Execute instruction"""
         self.runner.call_stack.push(self.runner.next_ip)
-        self.runner.jump_to_label(self.args[0].value)
+        self.runner.next_ip = self.target
 
 
 class Return(BaseInstruction):
     """RETURN"""
 
+    __slots__ = ()
+
     def execute(self):
         """Execute instruction"""
         self.runner.next_ip = self.runner.call_stack.pop()
@@ -112,157 +89,170 @@ class Return(BaseInstruction):
 class PushS(BaseInstruction):
     """PUSHS <symb>"""
 
+    __slots__ = ()
+
     def execute(self):
         """Execute instruction"""
         evaled = self._evaluate_args([0])
-        self.runner.stack.push(copy.copy(evaled[0]))
+        self.runner.stack.push(evaled[0])
 
 
 class PopS(BaseInstruction):
     """POPS <var>"""
 
+    __slots__ = ()
+
     def execute(self):
         """Execute instruction"""
-        evaled = self._evaluate_args()
-        evaled[0].set(self.runner.stack.pop())
+        self._evaluate_args()
+        self._store(self.runner.stack.pop())
 
 
 class Add(BaseInstruction):
     """ADD <var> <symb1> <symb2>"""
 
+    __slots__ = ()
+
     def execute(self):
         """Execute instruction"""
         evaled = self._evaluate_args([1, 2])
-        if evaled[1].type != DataType.INT or evaled[2].type != DataType.INT:
+        if type(evaled[1]) is not int or type(evaled[2]) is not int:
             exit_program(StatusCode.INVALID_TYPE, "Invalid argument type")
-        evaled[0].value = evaled[1].value + evaled[2].value
-        evaled[0].type = DataType.INT
+        self._store(evaled[1] + evaled[2])
 
 
 class Sub(BaseInstruction):
     """SUB <var> <symb1> <symb2>"""
 
+    __slots__ = ()
+
     def execute(self):
         """Execute instruction"""
         evaled = self._evaluate_args([1, 2])
-        if evaled[1].type != DataType.INT or evaled[2].type != DataType.INT:
+        if type(evaled[1]) is not int or type(evaled[2]) is not int:
             exit_program(StatusCode.INVALID_TYPE, "Invalid argument type")
-        evaled[0].value = evaled[1].value - evaled[2].value
-        evaled[0].type = DataType.INT
+        self._store(evaled[1] - evaled[2])
 
 
 class Mul(BaseInstruction):
     """MUL <var> <symb1> <symb2>"""
 
+    __slots__ = ()
+
     def execute(self):
         """Execute instruction"""
         evaled = self._evaluate_args([1, 2])
-        if evaled[1].type != DataType.INT or evaled[2].type != DataType.INT:
+        if type(evaled[1]) is not int or type(evaled[2]) is not int:
             exit_program(StatusCode.INVALID_TYPE, "Invalid argument type")
-        evaled[0].value = evaled[1].value * evaled[2].value
-        evaled[0].type = DataType.INT
+        self._store(evaled[1] * evaled[2])
 
 
 class IDiv(BaseInstruction):
     """IDIV <var> <symb1> <symb2>"""
 
+    __slots__ = ()
+
     def execute(self):
         """Execute instruction"""
         evaled = self._evaluate_args([1, 2])
-        if evaled[1].type != DataType.INT or evaled[2].type != DataType.INT:
+        if type(evaled[1]) is not int or type(evaled[2]) is not int:
             exit_program(StatusCode.INVALID_TYPE, "Invalid argument type")
-        if evaled[2].value == 0:
+        if evaled[2] == 0:
             exit_program(StatusCode.INVALID_VALUE, "Division by zero")
-        evaled[0].value = evaled[1].value // evaled[2].value
-        evaled[0].type = DataType.INT
+        self._store(evaled[1] // evaled[2])
 
 
 class Lt(BaseInstruction):
     """LT <var> <symb1> <symb2>"""
 
+    __slots__ = ()
+
     def execute(self):
         """Execute instruction"""
         evaled = self._evaluate_args([1, 2])
-        if evaled[1].type != evaled[2].type or evaled[1].type == DataType.NIL or evaled[2].type == DataType.NIL:
+        if type(evaled[1]) is not type(evaled[2]) or evaled[1] is NIL:
             exit_program(StatusCode.INVALID_TYPE, "Invalid argument type")
-        evaled[0].value = evaled[1].value < evaled[2].value
-        evaled[0].type = DataType.BOOL
+        self._store(evaled[1] < evaled[2])
 
 
 class Gt(BaseInstruction):
     """GT <var> <symb1> <symb2>"""
 
+    __slots__ = ()
+
     def execute(self):
         """Execute instruction"""
         evaled = self._evaluate_args([1, 2])
-        if evaled[1].type != evaled[2].type or evaled[1].type == DataType.NIL or evaled[2].type == DataType.NIL:
+        if type(evaled[1]) is not type(evaled[2]) or evaled[1] is NIL:
             exit_program(StatusCode.INVALID_TYPE, "Invalid argument type")
-        evaled[0].value = evaled[1].value > evaled[2].value
-        evaled[0].type = DataType.BOOL
+        self._store(evaled[1] > evaled[2])
 
 
 class Eq(BaseInstruction):
     """EQ <var> <symb1> <symb2>"""
 
+    __slots__ = ()
+
     def execute(self):
         """Execute instruction"""
         evaled = self._evaluate_args([1, 2])
-        if evaled[1].type != evaled[2].type and evaled[1].type != DataType.NIL and evaled[2].type != DataType.NIL:
+        if type(evaled[1]) is not type(evaled[2]) and evaled[1] is not NIL and evaled[2] is not NIL:
             exit_program(StatusCode.INVALID_TYPE, "Invalid argument type")
-        if evaled[1].type == DataType.NIL or evaled[2].type == DataType.NIL:
-            evaled[0].value = evaled[1].type == evaled[2].type
-        else:
-            evaled[0].value = evaled[1].value == evaled[2].value
-        evaled[0].type = DataType.BOOL
+        # Nil is a singleton, so it is equal only to itself
+        self._store(evaled[1] == evaled[2])
 
 
 class And(BaseInstruction):
     """AND <var> <symb1> <symb2>"""
 
+    __slots__ = ()
+
     def execute(self):
         """Execute instruction"""
         evaled = self._evaluate_args([1, 2])
-        if evaled[1].type != DataType.BOOL or evaled[2].type != DataType.BOOL:
+        if type(evaled[1]) is not bool or type(evaled[2]) is not bool:
             exit_program(StatusCode.INVALID_TYPE, "Invalid argument type")
-        evaled[0].value = evaled[1].value and evaled[2].value
-        evaled[0].type = DataType.BOOL
+        self._store(evaled[1] and evaled[2])
 
 
 class Or(BaseInstruction):
     """OR <var> <symb1> <symb2>"""
 
+    __slots__ = ()
+
     def execute(self):
         """Execute instruction"""
         evaled = self._evaluate_args([1, 2])
-        if evaled[1].type != DataType.BOOL or evaled[2].type != DataType.BOOL:
+        if type(evaled[1]) is not bool or type(evaled[2]) is not bool:
             exit_program(StatusCode.INVALID_TYPE, "Invalid argument type")
-        evaled[0].value = evaled[1].value or evaled[2].value
-        evaled[0].type = DataType.BOOL
+        self._store(evaled[1] or evaled[2])
 
 
 class Not(BaseInstruction):
     """NOT <var> <symb>"""
 
+    __slots__ = ()
+
     def execute(self):
         """Execute instruction"""
-        evaled = self._evaluate_args([1, 2])
-        if evaled[1].type != DataType.BOOL:
+        evaled = self._evaluate_args([1])
+        if type(evaled[1]) is not bool:
             exit_program(StatusCode.INVALID_TYPE, "Invalid argument type")
-        evaled[0].value = not evaled[1].value
-        evaled[0].type = DataType.BOOL
+        self._store(not evaled[1])
 
 
 class Int2Char(BaseInstruction):
     """INT2CHAR <var> <symb>"""
 
+    __slots__ = ()
+
     def execute(self):
         """Execute instruction"""
         evaled = self._evaluate_args([1])
-        if evaled[1].type != DataType.INT:
+        if type(evaled[1]) is not int:
             exit_program(StatusCode.INVALID_TYPE, "Invalid argument type")
         try:
-            evaled[0].value = chr(evaled[1].value)
-            evaled[0].type = DataType.STRING
+            self._store(chr(evaled[1]))
         except ValueError:
             exit_program(StatusCode.INVALID_STRING, "Invalid range of int")
 
@@ -270,134 +260,137 @@ class Int2Char(BaseInstruction):
 class Stri2Int(BaseInstruction):
     """STRI2INT <var> <symb1> <symb2>"""
 
+    __slots__ = ()
+
     def execute(self):
         """Execute instruction"""
         evaled = self._evaluate_args([1, 2])
-        if evaled[1].type != DataType.STRING or evaled[2].type != DataType.INT:
+        if type(evaled[1]) is not str or type(evaled[2]) is not int:
             exit_program(StatusCode.INVALID_TYPE, "Invalid argument type")
-        if evaled[2].value < 0 or evaled[2].value >= len(evaled[1].value):
+        if evaled[2] < 0 or evaled[2] >= len(evaled[1]):
             exit_program(StatusCode.INVALID_STRING, "Invalid range of int")
-        evaled[0].value = ord(evaled[1].value[evaled[2].value])
-        evaled[0].type = DataType.INT
+        self._store(ord(evaled[1][evaled[2]]))
 
 
 class Read(BaseInstruction):
     """READ <var> <type>"""
 
+    __slots__ = ()
+
     def execute(self):
         """Execute instruction"""
         evaled = self._evaluate_args([1])
 
+        # Prompts written so far have to be visible to the writer of input
+        if self.runner.input.interactive:
+            stdout.flush()
         try:
-            input_str = input()
-            if evaled[1].value == "int":
-                evaled[0].value = int(input_str)
-                evaled[0].type = DataType.INT
-            elif evaled[1].value == "bool":
-                if input_str.lower() == "true":
-                    evaled[0].value = True
-                else:
-                    evaled[0].value = False
-                evaled[0].type = DataType.BOOL
-            elif evaled[1].value == "string":
-                evaled[0].value = input_str
-                evaled[0].type = DataType.STRING
+            input_str = self.runner.input.read_line()
+            if evaled[1] == "int":
+                self._store(int(input_str))
+            elif evaled[1] == "bool":
+                self._store(input_str.lower() == "true")
+            elif evaled[1] == "string":
+                self._store(input_str)
         except (EOFError, ValueError):
-            evaled[0].type = DataType.NIL
+            self._store(NIL)
 
 
 class Write(BaseInstruction):
     """WRITE <symb>"""
 
+    __slots__ = ()
+
     def execute(self):
         """Execute instruction"""
         evaled = self._evaluate_args([0])
-        if evaled[0].type == DataType.BOOL:
-            if evaled[0].value:
-                print("true", end="", flush=True)
+        if type(evaled[0]) is bool:
+            if evaled[0]:
+                stdout.write("true")
             else:
-                print("false", end="", flush=True)
-        elif evaled[0].type == DataType.NIL:
-            print("", end="", flush=True)
+                stdout.write("false")
+        elif evaled[0] is NIL:
+            stdout.write("")
         else:
-            print(evaled[0].value, end="", flush=True)
+            stdout.write(str(evaled[0]))
 
 
 class Concat(BaseInstruction):
     """CONCAT <var> <symb1> <symb2>"""
 
+    __slots__ = ()
+
     def execute(self):
         """Execute instruction"""
         evaled = self._evaluate_args([1, 2])
-        if evaled[1].type != DataType.STRING or evaled[2].type != DataType.STRING:
+        if type(evaled[1]) is not str or type(evaled[2]) is not str:
             exit_program(StatusCode.INVALID_TYPE, "Invalid argument type")
-        evaled[0].value = evaled[1].value + evaled[2].value
-        evaled[0].type = DataType.STRING
+        self._store(evaled[1] + evaled[2])
 
 
 class StrLen(BaseInstruction):
     """STRLEN <var> <symb>"""
 
+    __slots__ = ()
+
     def execute(self):
         """Execute instruction"""
         evaled = self._evaluate_args([1])
-        if evaled[1].type != DataType.STRING:
+        if type(evaled[1]) is not str:
             exit_program(StatusCode.INVALID_TYPE, "Invalid argument type")
-        evaled[0].value = len(evaled[1].value)
-        evaled[0].type = DataType.INT
+        self._store(len(evaled[1]))
 
 
 class GetChar(BaseInstruction):
     """GETCHAR <var> <symb1> <symb2>"""
 
+    __slots__ = ()
+
     def execute(self):
         """Execute instruction"""
         evaled = self._evaluate_args([1, 2])
-        if evaled[1].type != DataType.STRING or evaled[2].type != DataType.INT:
+        if type(evaled[1]) is not str or type(evaled[2]) is not int:
             exit_program(StatusCode.INVALID_TYPE, "Invalid argument type")
-        if evaled[2].value < 0 or evaled[2].value >= len(evaled[1].value):
+        if evaled[2] < 0 or evaled[2] >= len(evaled[1]):
             exit_program(StatusCode.INVALID_STRING, "Invalid argument value")
-        evaled[0].value = evaled[1].value[evaled[2].value]
-        evaled[0].type = DataType.STRING
+        self._store(evaled[1][evaled[2]])
 
 
 class SetChar(BaseInstruction):
     """SETCHAR <var> <symb1> <symb2>"""
 
+    __slots__ = ()
+
     def execute(self):
         """Execute instruction"""
         evaled = self._evaluate_args([0, 1, 2])
-        if evaled[0].type != DataType.STRING or evaled[1].type != DataType.INT or evaled[2].type != DataType.STRING:
+        if type(evaled[0]) is not str or type(evaled[1]) is not int or type(evaled[2]) is not str:
             exit_program(StatusCode.INVALID_TYPE, "Invalid argument type")
-        if evaled[1].value < 0 or evaled[1].value >= len(evaled[0].value) or len(evaled[2].value) == 0:
+        if evaled[1] < 0 or evaled[1] >= len(evaled[0]) or len(evaled[2]) == 0:
             exit_program(StatusCode.INVALID_STRING, "Invalid argument value")
-        evaled[0].value = evaled[0].value[:evaled[1].value] + \
-            evaled[2].value[0] + evaled[0].value[evaled[1].value + 1:]
-        evaled[0].type = DataType.STRING
+        self._store(evaled[0][:evaled[1]] + evaled[2][0] + evaled[0][evaled[1] + 1:])
 
 
 class Type(BaseInstruction):
     """TYPE <var> <symb>"""
 
+    __slots__ = ()
+
     def execute(self):
         """Execute instruction"""
         evaled = self._evaluate_args()
-        if evaled[1].type == DataType.NIL:
-            evaled[0].value = "nil"
-        elif evaled[1].type == DataType.INT:
-            evaled[0].value = "int"
-        elif evaled[1].type == DataType.BOOL:
-            evaled[0].value = "bool"
-        elif evaled[1].type == DataType.STRING:
-            evaled[0].value = "string"
-        elif evaled[1].type == None:
-            evaled[0].value = ""
-        evaled[0].type = DataType.STRING
+        data_type = type_of(evaled[1])
+        if data_type is None:
+            self._store("")
+        else:
+            self._store(data_type.name.lower())
 
 
 class Label(BaseInstruction):
     """LABEL <label>"""
 
+    __slots__ = ()
+
     def execute(self):
         """Execute instruction"""
         # Labels are not executed
@@ -406,63 +399,347 @@ class Label(BaseInstruction):
 class Jump(BaseInstruction):
     """JUMP <label>"""
 
+    __slots__ = ()
+
     def execute(self):
         """Execute instruction"""
-        evaled = self._evaluate_args()
-        self.runner.jump_to_label(evaled[0].value)
+        self.runner.next_ip = self.target
 
 
 class JumpIfEq(BaseInstruction):
     """JUMPIFEQ <label> <symb1> <symb2>"""
 
+    __slots__ = ()
+
     def execute(self):
         """Execute instruction"""
         evaled = self._evaluate_args([1, 2])
-        if evaled[1].type != evaled[2].type and evaled[1].type != DataType.NIL and evaled[2].type != DataType.NIL:
+        if type(evaled[1]) is not type(evaled[2]) and evaled[1] is not NIL and evaled[2] is not NIL:
             exit_program(StatusCode.INVALID_TYPE, "Invalid argument type")
-        self.runner.check_label_exists(evaled[0].value)
-        if evaled[1].value == evaled[2].value:
-            self.runner.jump_to_label(evaled[0].value)
+        if evaled[1] == evaled[2]:
+            self.runner.next_ip = self.target
 
 
 class JumpIfNeq(BaseInstruction):
     """JUMPIFNEQ <label> <symb1> <symb2>"""
 
+    __slots__ = ()
+
     def execute(self):
         """Execute instruction"""
         evaled = self._evaluate_args([1, 2])
-        if evaled[1].type != evaled[2].type and evaled[1].type != DataType.NIL and evaled[2].type != DataType.NIL:
+        if type(evaled[1]) is not type(evaled[2]) and evaled[1] is not NIL and evaled[2] is not NIL:
             exit_program(StatusCode.INVALID_TYPE, "Invalid argument type")
-        self.runner.check_label_exists(evaled[0].value)
-        if evaled[1].value != evaled[2].value:
-            self.runner.jump_to_label(evaled[0].value)
+        if evaled[1] != evaled[2]:
+            self.runner.next_ip = self.target
 
 
 class Exit(BaseInstruction):
     """EXIT <symb>"""
 
+    __slots__ = ()
+
     def execute(self):
         """Execute instruction"""
         evaled = self._evaluate_args([0])
-        if evaled[0].type != DataType.INT:
+        if type(evaled[0]) is not int:
             exit_program(StatusCode.INVALID_TYPE, "Invalid argument type")
-        if evaled[0].value < 0 or evaled[0].value > 49:
+        if evaled[0] < 0 or evaled[0] > 49:
             exit_program(StatusCode.INVALID_VALUE, "Invalid argument value")
-        exit(evaled[0].value)
+        stdout.flush()
+        exit(evaled[0])
 
 
 class DPrint(BaseInstruction):
     """DPRINT <symb>"""
 
+    __slots__ = ()
+
     def execute(self):
         """Execute instruction"""
         evaled = self._evaluate_args()
-        print("*** DPRINT *** Name: {}, Type: {}, Value: {}".format(evaled[0].name, evaled[0].type, evaled[0].value), file=sys.stderr)
+        name = self.args[0].name if self.args[0].type == DataType.VAR else None
+        print("*** DPRINT *** Name: {}, Type: {}, Value: {}".format(name, type_of(evaled[0]), evaled[0]), file=sys.stderr)
 
 
 class Break(BaseInstruction):
     """BREAK"""
 
+    __slots__ = ("position",)
+
+    def __init__(self, opcode, order, args):
+        super().__init__(opcode, order, args)
+        # Position in the unoptimized program, assigned by the program
+        self.position = None
+
+    def execute(self):
+        """Execute instruction"""
+        print("*** BREAK *** IP: {}".format(self.position), file=sys.stderr)
+
+
+class Superinstruction(BaseInstruction):
+    """Pair of instructions executed in a single step
+
+    The second instruction is also kept on its own index in the program,
+    so indexes of all instructions stay the same.
+    """
+
+    __slots__ = ("first", "second")
+
+    def __init__(self, first, second):
+        super().__init__(first.opcode, first.order, first.args)
+        self.first = first
+        self.second = second
+
+    def bind(self, runner):
+        """Bind instruction to runner executing it"""
+        super().bind(runner)
+        self.first.bind(runner)
+        self.second.bind(runner)
+
+    def execute(self):
+        """Execute instruction"""
+        # Skip the second instruction
+        self.runner.next_ip += 1
+        self.first.execute()
+        self.second.execute()
+
+
+class PushPopS(Superinstruction):
+    """PUSHS <symb>; POPS <var>"""
+
+    __slots__ = ()
+
+    def execute(self):
+        """Execute instruction"""
+        self.runner.next_ip += 1
+        src = self.first._evaluate_args([0])[0]
+        self.second._evaluate_args()
+        self.second._store(src)
+
+
+class CreatePushFrame(Superinstruction):
+    """CREATEFRAME; PUSHFRAME"""
+
+    __slots__ = ()
+
     def execute(self):
         """Execute instruction"""
-        print("*** BREAK *** IP: {}".format(self.runner.instruction_pointer), file=sys.stderr)
+        self.runner.next_ip += 1
+        self.runner.frames.create_frame()
+        self.runner.frames.local_frames.push_frame()
+
+
+class DefVarMove(Superinstruction):
+    """DEFVAR <var>; MOVE <var> <symb>"""
+
+    __slots__ = ()
+
+
+class CompareJump(Superinstruction):
+    """<EQ|LT|GT> <var> <symb1> <symb2>; <JUMPIFEQ|JUMPIFNEQ> <label> <var> bool@<value>"""
+
+    __slots__ = ("expected", "equal")
+
+    def __init__(self, first, second, expected):
+        super().__init__(first, second)
+        # Jump if the comparison result is (JUMPIFEQ) or is not the value
+        self.expected = expected
+        self.equal = isinstance(second, JumpIfEq)
+
+    def execute(self):
+        """Execute instruction"""
+        self.runner.next_ip += 1
+        self.first.execute()
+        # Result of the comparison is always bool, so no type check is needed
+        result = self.first.args[0]
+        value = self.runner.frames.get_variable(result.frame, result.slot)
+        if (value == self.expected) == self.equal:
+            self.runner.next_ip = self.second.target
+
+
+class UncheckedAdd(Add):
+    """ADD <var> <int> <int> with operand types proven at load time"""
+
+    __slots__ = ()
+
+    def execute(self):
+        """Execute instruction"""
+        evaled = self._evaluate_args()
+        self._store(evaled[1] + evaled[2])
+
+
+class UncheckedSub(Sub):
+    """SUB <var> <int> <int> with operand types proven at load time"""
+
+    __slots__ = ()
+
+    def execute(self):
+        """Execute instruction"""
+        evaled = self._evaluate_args()
+        self._store(evaled[1] - evaled[2])
+
+
+class UncheckedMul(Mul):
+    """MUL <var> <int> <int> with operand types proven at load time"""
+
+    __slots__ = ()
+
+    def execute(self):
+        """Execute instruction"""
+        evaled = self._evaluate_args()
+        self._store(evaled[1] * evaled[2])
+
+
+class UncheckedIDiv(IDiv):
+    """IDIV <var> <int> <int> with operand types proven at load time"""
+
+    __slots__ = ()
+
+    def execute(self):
+        """Execute instruction"""
+        evaled = self._evaluate_args()
+        if evaled[2] == 0:
+            exit_program(StatusCode.INVALID_VALUE, "Division by zero")
+        self._store(evaled[1] // evaled[2])
+
+
+class UncheckedLt(Lt):
+    """LT <var> <symb1> <symb2> with operand types proven at load time"""
+
+    __slots__ = ()
+
+    def execute(self):
+        """Execute instruction"""
+        evaled = self._evaluate_args()
+        self._store(evaled[1] < evaled[2])
+
+
+class UncheckedGt(Gt):
+    """GT <var> <symb1> <symb2> with operand types proven at load time"""
+
+    __slots__ = ()
+
+    def execute(self):
+        """Execute instruction"""
+        evaled = self._evaluate_args()
+        self._store(evaled[1] > evaled[2])
+
+
+class UncheckedEq(Eq):
+    """EQ <var> <symb1> <symb2> with operand types proven at load time"""
+
+    __slots__ = ()
+
+    def execute(self):
+        """Execute instruction"""
+        evaled = self._evaluate_args()
+        self._store(evaled[1] == evaled[2])
+
+
+class UncheckedAnd(And):
+    """AND <var> <bool> <bool> with operand types proven at load time"""
+
+    __slots__ = ()
+
+    def execute(self):
+        """Execute instruction"""
+        evaled = self._evaluate_args()
+        self._store(evaled[1] and evaled[2])
+
+
+class UncheckedOr(Or):
+    """OR <var> <bool> <bool> with operand types proven at load time"""
+
+    __slots__ = ()
+
+    def execute(self):
+        """Execute instruction"""
+        evaled = self._evaluate_args()
+        self._store(evaled[1] or evaled[2])
+
+
+class UncheckedNot(Not):
+    """NOT <var> <bool> with operand type proven at load time"""
+
+    __slots__ = ()
+
+    def execute(self):
+        """Execute instruction"""
+        evaled = self._evaluate_args()
+        self._store(not evaled[1])
+
+
+class UncheckedConcat(Concat):
+    """CONCAT <var> <string> <string> with operand types proven at load time"""
+
+    __slots__ = ()
+
+    def execute(self):
+        """Execute instruction"""
+        evaled = self._evaluate_args()
+        self._store(evaled[1] + evaled[2])
+
+
+class UncheckedJumpIfEq(JumpIfEq):
+    """JUMPIFEQ <label> <symb1> <symb2> with operand types proven at load time"""
+
+    __slots__ = ()
+
+    def execute(self):
+        """Execute instruction"""
+        evaled = self._evaluate_args()
+        if evaled[1] == evaled[2]:
+            self.runner.next_ip = self.target
+
+
+class UncheckedJumpIfNeq(JumpIfNeq):
+    """JUMPIFNEQ <label> <symb1> <symb2> with operand types proven at load time"""
+
+    __slots__ = ()
+
+    def execute(self):
+        """Execute instruction"""
+        evaled = self._evaluate_args()
+        if evaled[1] != evaled[2]:
+            self.runner.next_ip = self.target
+
+
+# Instruction classes by opcode
+CLASSES = {
+    "MOVE": Move,
+    "CREATEFRAME": CreateFrame,
+    "PUSHFRAME": PushFrame,
+    "POPFRAME": PopFrame,
+    "DEFVAR": DefVar,
+    "CALL": Call,
+    "RETURN": Return,
+    "PUSHS": PushS,
+    "POPS": PopS,
+    "ADD": Add,
+    "SUB": Sub,
+    "MUL": Mul,
+    "IDIV": IDiv,
+    "LT": Lt,
+    "GT": Gt,
+    "EQ": Eq,
+    "AND": And,
+    "OR": Or,
+    "NOT": Not,
+    "INT2CHAR": Int2Char,
+    "STRI2INT": Stri2Int,
+    "READ": Read,
+    "WRITE": Write,
+    "CONCAT": Concat,
+    "STRLEN": StrLen,
+    "GETCHAR": GetChar,
+    "SETCHAR": SetChar,
+    "TYPE": Type,
+    "LABEL": Label,
+    "JUMP": Jump,
+    "JUMPIFEQ": JumpIfEq,
+    "JUMPIFNEQ": JumpIfNeq,
+    "EXIT": Exit,
+    "DPRINT": DPrint,
+    "BREAK": Break
+}
@@ -5,15 +5,127 @@ IPPcode23 interpreter
 """
 
 import sys
+from time import perf_counter
+
+# Start of imports, measured for --startup-profile
+STARTED = perf_counter()
+
+# Modules of engines and tools are imported only by runs using them
 from runner import Runner
+from program import Program
 from arguments import Arguments
+from error import StatusCode, exit_program
+from output import stdout
 
-if __name__ == "__main__":
+IMPORTED = perf_counter()
+
+
+class StartupProfile:
+    """Timings of startup phases, reported before the first instruction"""
+
+    def __init__(self):
+        self.phases = [("imports", IMPORTED - STARTED)]
+        self.last = perf_counter()
+
+    def mark(self, phase):
+        """End phase started by the previous mark"""
+        now = perf_counter()
+        self.phases.append((phase, now - self.last))
+        self.last = now
+
+    def report(self):
+        """Print timings of all phases to standard error"""
+        phases = self.phases + [("total", sum(time for (_, time) in self.phases))]
+        print("*** STARTUP *** " + ", ".join(
+            "{}: {:.3f} ms".format(phase, time * 1000) for (phase, time) in phases),
+            file=sys.stderr)
+
+
+def main():
+    """Run the interpreter with command line arguments"""
+    profile = StartupProfile()
     # Parse arguments
     args = Arguments()
     args.parse()
+    profile.mark("arguments")
+
+    # Run a program compiled ahead of time
+    if args.run_compiled is not None:
+        from compiler import load_module
+        module = load_module(args.run_compiled)
+        profile.mark("load")
+        if args.startup_profile:
+            profile.report()
+        with args.input:
+            module.run(args.input)
+        exit(StatusCode.OK.value)
+
+    # Load the program, possibly from cache
+    if args.cache_dir is None:
+        program = Program(args.source, args.optimize)
+    else:
+        import io
+        from cache import ProgramCache
+        # Cache is keyed by the whole source, so it has to be read first
+        try:
+            source = args.source.read()
+        except OSError:
+            exit_program(StatusCode.INPUT_ERROR, "Input error")
+        cache = ProgramCache(args.cache_dir, "O" if args.optimize else "")
+        program = cache.load(source)
+        if program is None:
+            program = Program(io.StringIO(source), args.optimize)
+            cache.store(source, program)
+    profile.mark("load")
+
+    # Compile the program instead of running it
+    if args.compile_to is not None:
+        from compiler import Compiler
+        try:
+            with open(args.compile_to, "w", encoding="utf-8") as file:
+                file.write(Compiler(program).compile())
+        except OSError:
+            exit_program(StatusCode.OUTPUT_ERROR, "Output error")
+        exit(StatusCode.OK.value)
 
     # Run the program
-    runner = Runner(args.source)
-    with args.input as sys.stdin:
-        runner.run()
+    runner = Runner(program, args.input)
+    if args.stats is not None:
+        from stats import StatsHook
+        runner.add_hook(StatsHook(runner, args.stats))
+    if args.profile is not None:
+        from profiler import ProfileHook
+        runner.add_hook(ProfileHook(runner, args.profile, args.profile_weight))
+    if args.coverage is not None:
+        import os
+        from coverage_map import CoverageEngine
+        # Sources are named by absolute paths, so maps of runs can be merged
+        source = args.source.name
+        if source != "<stdin>":
+            source = os.path.abspath(source)
+        engine = CoverageEngine(runner, source, args.coverage)
+    elif args.engine == "threaded":
+        from threaded import ThreadedEngine
+        engine = ThreadedEngine(runner)
+    elif args.engine == "tracing":
+        from tracing import TracingEngine
+        engine = TracingEngine(runner)
+    else:
+        engine = runner
+    profile.mark("runner")
+    if args.startup_profile:
+        profile.report()
+    if args.inputs is not None:
+        from multirun import MultiRunner
+        MultiRunner(engine, runner, args.jobs).run(args.inputs)
+        exit(StatusCode.OK.value)
+    with args.input:
+        try:
+            engine.run()
+        finally:
+            # Output written before an unexpected exception is not lost
+            stdout.flush()
+
+
+if __name__ == "__main__":
+    main()
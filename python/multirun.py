@@ -0,0 +1,84 @@
+"""Runs of one program over many input files"""
+
+import os
+import sys
+import traceback
+from error import StatusCode, exit_program
+from output import stdout
+
+
+class MultiRunner:
+    """Runner of one loaded program over many input files
+
+    The engine is prepared once, and every input is run by a forked child
+    sharing it copy-on-write, so runs cannot affect each other. Output,
+    error output and exit code of input <name> are written side by side
+    to <name>.stdout, <name>.stderr and <name>.rc. Up to jobs children
+    run at the same time.
+    """
+
+    def __init__(self, engine, runner, jobs):
+        self.engine = engine
+        self.runner = runner
+        self.jobs = jobs
+
+    def run(self, paths):
+        """Run the program with every input"""
+        running = {}
+        pending = list(reversed(paths))
+        # Nothing buffered may be written again by children
+        stdout.flush()
+        sys.stderr.flush()
+        while pending or running:
+            while pending and len(running) < self.jobs:
+                path = pending.pop()
+                running[self._start(path)] = path
+            (pid, status) = os.wait()
+            path = running.pop(pid)
+            status = os.waitstatus_to_exitcode(status)
+            try:
+                with open(path + ".rc", "w", encoding="utf-8") as file:
+                    file.write("{}\n".format(status))
+            except OSError:
+                exit_program(StatusCode.OUTPUT_ERROR, "Output error")
+
+    def _start(self, path):
+        """Fork child running the program with input file"""
+        pid = os.fork()
+        if pid != 0:
+            return pid
+        status = StatusCode.INTERNAL_ERROR.value
+        try:
+            status = self._child(path)
+        except Exception:  # pylint: disable=broad-except
+            traceback.print_exc()
+        finally:
+            os._exit(status)
+
+    def _child(self, path):
+        """Run the program in the child with redirected streams, get exit code"""
+        try:
+            output = os.open(path + ".stdout", os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o644)
+            errors = os.open(path + ".stderr", os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o644)
+        except OSError:
+            return StatusCode.OUTPUT_ERROR.value
+        os.dup2(output, 1)
+        os.dup2(errors, 2)
+        os.close(output)
+        os.close(errors)
+        status = 0
+        try:
+            try:
+                input_file = open(path, "r", encoding="utf-8")
+            except OSError:
+                exit_program(StatusCode.INPUT_ERROR, "Input error")
+            with input_file:
+                self.runner.set_input(input_file)
+                self.engine.run()
+        except SystemExit as exit_:
+            status = exit_.code if isinstance(exit_.code, int) else 1
+        finally:
+            # Output written before an unexpected exception is not lost
+            stdout.flush()
+            sys.stderr.flush()
+        return status
@@ -0,0 +1,175 @@
+"""Load-time program optimizations"""
+
+from value import DataType
+from instructions import (CreateFrame, PushFrame, DefVar, Move, PushS, PopS,
+                          Add, Sub, Mul, IDiv, Lt, Gt, Eq, And, Or, Not,
+                          Int2Char, Stri2Int, Concat, StrLen, GetChar, Type,
+                          Label, Jump, JumpIfEq, JumpIfNeq, CreatePushFrame,
+                          PushPopS, DefVarMove, CompareJump)
+from cfg import ControlFlowGraph
+
+
+def fold_constants(instructions, constants):
+    """Evaluate instructions with only literal operands at load time
+
+    Operations are replaced by MOVE of their result and conditional jumps
+    by JUMP or nothing. Operations which would fail at runtime are kept,
+    so the error is still reported when (and if) they are executed.
+    Results are added to the constant pool of the program.
+    """
+    folded = []
+    for instruction in instructions:
+        if isinstance(instruction, (JumpIfEq, JumpIfNeq)):
+            taken = _fold_jump(instruction)
+            if taken is None:
+                folded.append(instruction)
+            elif taken:
+                folded.append(Jump("JUMP", instruction.order,
+                                   instruction.args[:1]))
+            continue
+        result = _fold_operation(instruction)
+        if result is None:
+            folded.append(instruction)
+        else:
+            folded.append(Move("MOVE", instruction.order,
+                               (instruction.args[0], constants.literal(*result))))
+    return folded
+
+
+def eliminate_dead_code(instructions):
+    """Drop instructions unreachable from program start and unused labels"""
+    graph = ControlFlowGraph(instructions)
+    targets = graph.targets()
+    live = []
+    for block in graph.reachable():
+        for instruction in instructions[block.start:block.end]:
+            if isinstance(instruction, Label) and instruction.args[0].value not in targets:
+                continue
+            live.append(instruction)
+    return live
+
+
+def fuse_superinstructions(instructions):
+    """Replace common instruction pairs with superinstructions
+
+    Only the first instruction of a pair is replaced, the second one keeps
+    its index, so labels, jump targets and BREAK positions are unchanged.
+    """
+    fused = list(instructions)
+    index = 0
+    while index < len(fused) - 1:
+        superinstruction = _fuse(fused[index], fused[index + 1])
+        if superinstruction is None:
+            index += 1
+        else:
+            fused[index] = superinstruction
+            index += 2
+    return fused
+
+
+def _fuse(first, second):
+    if isinstance(first, PushS) and isinstance(second, PopS):
+        return PushPopS(first, second)
+    if isinstance(first, CreateFrame) and isinstance(second, PushFrame):
+        return CreatePushFrame(first, second)
+    if isinstance(first, DefVar) and isinstance(second, Move):
+        return DefVarMove(first, second)
+    if isinstance(first, (Eq, Lt, Gt)) and isinstance(second, (JumpIfEq, JumpIfNeq)):
+        expected = _compared_bool(first.args[0], second.args[1], second.args[2])
+        if expected is not None:
+            return CompareJump(first, second, expected)
+    return None
+
+
+def _compared_bool(result, left, right):
+    """Get bool literal compared with result variable, None if there is not one"""
+    for (var, literal) in ((left, right), (right, left)):
+        if (var.type == DataType.VAR and literal.type == DataType.BOOL
+                and var.frame == result.frame and var.name == result.name):
+            return literal.value
+    return None
+
+
+def _literals(instruction):
+    """Get source operands if all of them are literals, None otherwise"""
+    sources = instruction.args[1:]
+    if any(arg.type == DataType.VAR for arg in sources):
+        return None
+    return sources
+
+
+def _fold_operation(instruction):
+    """Get (type, value) result of operation, None if it cannot be folded"""
+    if not isinstance(instruction, (Add, Sub, Mul, IDiv, Lt, Gt, Eq, And, Or, Not,
+                                    Int2Char, Stri2Int, Concat, StrLen, GetChar, Type)):
+        return None
+    args = _literals(instruction)
+    if args is None:
+        return None
+    types = [arg.type for arg in args]
+    values = [arg.value for arg in args]
+    if isinstance(instruction, Type):
+        return (DataType.STRING, types[0].name.lower())
+    if isinstance(instruction, (Add, Sub, Mul, IDiv)):
+        if types != [DataType.INT, DataType.INT]:
+            return None
+        if isinstance(instruction, Add):
+            return (DataType.INT, values[0] + values[1])
+        if isinstance(instruction, Sub):
+            return (DataType.INT, values[0] - values[1])
+        if isinstance(instruction, Mul):
+            return (DataType.INT, values[0] * values[1])
+        if values[1] == 0:
+            return None
+        return (DataType.INT, values[0] // values[1])
+    if isinstance(instruction, (Lt, Gt)):
+        if types[0] != types[1] or types[0] == DataType.NIL:
+            return None
+        if isinstance(instruction, Lt):
+            return (DataType.BOOL, values[0] < values[1])
+        return (DataType.BOOL, values[0] > values[1])
+    if isinstance(instruction, Eq):
+        if DataType.NIL in types:
+            return (DataType.BOOL, types[0] == types[1])
+        if types[0] != types[1]:
+            return None
+        return (DataType.BOOL, values[0] == values[1])
+    if isinstance(instruction, (And, Or)):
+        if types != [DataType.BOOL, DataType.BOOL]:
+            return None
+        if isinstance(instruction, And):
+            return (DataType.BOOL, values[0] and values[1])
+        return (DataType.BOOL, values[0] or values[1])
+    if isinstance(instruction, Not):
+        if types[0] != DataType.BOOL:
+            return None
+        return (DataType.BOOL, not values[0])
+    if isinstance(instruction, Concat):
+        if types != [DataType.STRING, DataType.STRING]:
+            return None
+        return (DataType.STRING, values[0] + values[1])
+    if isinstance(instruction, StrLen):
+        if types[0] != DataType.STRING:
+            return None
+        return (DataType.INT, len(values[0]))
+    if isinstance(instruction, Int2Char):
+        if types[0] != DataType.INT or not 0 <= values[0] <= 0x10FFFF:
+            return None
+        return (DataType.STRING, chr(values[0]))
+    # STRI2INT and GETCHAR
+    if types != [DataType.STRING, DataType.INT] or not 0 <= values[1] < len(values[0]):
+        return None
+    if isinstance(instruction, Stri2Int):
+        return (DataType.INT, ord(values[0][values[1]]))
+    return (DataType.STRING, values[0][values[1]])
+
+
+def _fold_jump(instruction):
+    """Get whether conditional jump is taken, None if it cannot be folded"""
+    args = _literals(instruction)
+    if args is None:
+        return None
+    (left, right) = args
+    if left.type != right.type and DataType.NIL not in (left.type, right.type):
+        return None
+    return (left.value == right.value) == isinstance(instruction, JumpIfEq)
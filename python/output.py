@@ -0,0 +1,33 @@
+"""Buffered program output"""
+
+import sys
+
+
+class OutputBuffer:
+    """Output buffer flushed at program end, on exit and before errors"""
+
+    # Flush automatically once this many characters are buffered
+    LIMIT = 1 << 16
+
+    def __init__(self):
+        self._parts = []
+        self._size = 0
+
+    def write(self, text):
+        """Write text to buffer"""
+        self._parts.append(text)
+        self._size += len(text)
+        if self._size >= self.LIMIT:
+            self.flush()
+
+    def flush(self):
+        """Write buffered text to standard output"""
+        if self._parts:
+            sys.stdout.write("".join(self._parts))
+            self._parts = []
+            self._size = 0
+        sys.stdout.flush()
+
+
+# Shared output of the interpreted program
+stdout = OutputBuffer()
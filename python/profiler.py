@@ -0,0 +1,100 @@
+"""Call-stack profiler"""
+
+from time import perf_counter_ns
+from error import StatusCode, exit_program
+from hooks import Hook
+from cfg import ControlFlowGraph
+import instructions as ins
+
+# Name of the call-stack frame of code outside of any call
+MAIN = "main"
+
+
+class ProfileHook(Hook):
+    """Execution hook attributing the run to call stacks and basic blocks
+
+    The hook keeps its own stack of labels called by CALL and returned
+    from by RETURN. Every executed instruction is attributed, by count or
+    by wall time, to the current call stack and the basic block it belongs
+    to. The result is written in the collapsed-stack format read by
+    flamegraph tools, one line per stack:
+
+        main;outer;inner;@loop 1234
+
+    Blocks are named by the label they start with, or by the order of
+    their first instruction.
+    """
+
+    def __init__(self, runner, path, weight="time"):
+        self.runner = runner
+        self.path = path
+        self.weight = weight
+        instructions = runner.instructions
+        graph = ControlFlowGraph(instructions)
+        self.block_names = [_block_name(instructions[block.start])
+                            for block in graph.blocks]
+        # Index of the block of every instruction
+        self.block_of = [0] * len(instructions)
+        for (index, block) in enumerate(graph.blocks):
+            for ip in range(block.start, block.end):
+                self.block_of[ip] = index
+        # Labels entered by CALL instructions, None elsewhere
+        self.callees = [instruction.args[0].value if isinstance(instruction, ins.Call) else None
+                      for instruction in instructions]
+        # Totals of blocks by call stack
+        self.totals = {}
+        self.by_time = weight == "time"
+        self.calls = [MAIN]
+        self.current = self.totals.setdefault(MAIN, [0] * len(self.block_names))
+        # Totals and block of the instruction being timed
+        self.previous = None
+        self.previous_block = 0
+        self.started = 0
+
+    def on_instruction(self, runner, ip, instruction):
+        """Attribute the instruction to the current stack and its block"""
+        if self.by_time:
+            now = perf_counter_ns()
+            if self.previous is not None:
+                self.previous[self.previous_block] += now - self.started
+            self.previous = self.current
+            self.previous_block = self.block_of[ip]
+            self.started = now
+        else:
+            self.current[self.block_of[ip]] += 1
+
+    def on_call(self, runner, ip, target):
+        """Enter the called label"""
+        self.calls.append(self.callees[ip])
+        self._switch()
+
+    def on_return(self, runner, ip, target):
+        """Leave the current label"""
+        self.calls.pop()
+        self._switch()
+
+    def on_end(self, runner, status):
+        """Write the profile"""
+        if self.previous is not None:
+            self.previous[self.previous_block] += perf_counter_ns() - self.started
+        self._write()
+
+    def _switch(self):
+        self.current = self.totals.setdefault(";".join(self.calls),
+                                              [0] * len(self.block_names))
+
+    def _write(self):
+        try:
+            with open(self.path, "w", encoding="utf-8") as file:
+                for (stack, totals) in sorted(self.totals.items()):
+                    for (name, total) in zip(self.block_names, totals):
+                        if total:
+                            file.write("%s;%s %d\n" % (stack, name, total))
+        except OSError:
+            exit_program(StatusCode.OUTPUT_ERROR, "Output error")
+
+
+def _block_name(instruction):
+    if isinstance(instruction, ins.Label):
+        return "@" + instruction.args[0].value
+    return "@%d" % instruction.order
@@ -0,0 +1,157 @@
+"""Loaded program"""
+
+import xml.etree.ElementTree as ET
+from frame import FrameKind, FrameLayout
+from instruction import ConstantPool
+from value import DataType
+from error import StatusCode, exit_program
+from instructions import (Label, Break, Call, Return, Exit, Jump, JumpIfEq, JumpIfNeq,
+                          instruction_factory)
+from validate import ValidationError, validate_root, validate_instruction
+
+
+class Program:
+    """Validated program with decoded instructions, labels and frame layouts
+
+    The program is independent of any runner, so it can be cached and
+    executed more than once.
+    """
+
+    # Number of characters of source read at once
+    CHUNK_SIZE = 1 << 16
+
+    def __init__(self, source, optimize=False):
+        self.constants = ConstantPool()
+        self.instructions = self._load(source)
+        self.labels = self._resolve_labels()
+        if optimize:
+            # Optimizer is imported only by runs using it
+            from optimizer import fold_constants, eliminate_dead_code
+            self.instructions = eliminate_dead_code(
+                fold_constants(self.instructions, self.constants))
+            self.labels = self._resolve_labels()
+        (self.global_layout, self.local_layout) = self._assign_slots()
+        if optimize:
+            from inference import specialize_types
+            from optimizer import fuse_superinstructions
+            self.instructions = fuse_superinstructions(
+                specialize_types(self.instructions))
+
+    def _load(self, source):
+        """Parse, validate and create instructions from source file
+
+        Instructions are created as soon as their elements are closed and
+        the elements are discarded afterwards, so the whole XML tree is
+        never held in memory. The first validation error is reported only
+        after the rest of the source turns out to be well-formed XML.
+        """
+        parser = ET.XMLPullParser(events=("start", "end"))
+        instructions = []
+        labels = set()
+        orders = set()
+        root = None
+        depth = 0
+        error = None
+        while True:
+            try:
+                chunk = source.read(self.CHUNK_SIZE)
+            except OSError:
+                exit_program(StatusCode.INPUT_ERROR, "Input error")
+            try:
+                if chunk:
+                    parser.feed(chunk)
+                else:
+                    parser.close()
+                for (event, element) in parser.read_events():
+                    if event == "start":
+                        depth += 1
+                        if depth == 1:
+                            root = element
+                            try:
+                                validate_root(root)
+                            except ValidationError as e:
+                                error = e
+                        continue
+                    depth -= 1
+                    if depth != 1:
+                        continue
+                    if error is None:
+                        try:
+                            instructions.append(instruction_factory(
+                                *validate_instruction(element, labels, orders),
+                                self.constants))
+                        except ValidationError as e:
+                            error = e
+                    root.remove(element)
+            except ET.ParseError:
+                exit_program(StatusCode.MALLFORMED, "XML error")
+            if not chunk:
+                break
+        if error is not None:
+            exit_program(error.status_code, error)
+        # Sort instructions by order
+        instructions = sorted(
+            instructions, key=lambda instruction: instruction.order)
+        for (index, instruction) in enumerate(instructions):
+            if isinstance(instruction, Break):
+                instruction.position = index
+        return instructions
+
+    def _assign_slots(self):
+        global_layout = FrameLayout()
+        local_layout = FrameLayout()
+        layouts = (global_layout, local_layout, local_layout)
+        # Local frames grow up to the highest slot they define, so names of
+        # functions using fewer local names get lower slots
+        for names in sorted(self._local_names(), key=len):
+            for name in names:
+                local_layout.slot(name)
+        # Give every variable name a fixed slot in its frame layout
+        for instruction in self.instructions:
+            for arg in instruction.args:
+                if arg.type == DataType.VAR:
+                    arg.slot = layouts[arg.frame].slot(arg.name)
+        return (global_layout, local_layout)
+
+    def _local_names(self):
+        """Get local names used by the main body and by every called function
+
+        Body of a function is everything reachable from its label without
+        following calls and returns.
+        """
+        entries = [0] + sorted({instruction.target for instruction in self.instructions
+                                if isinstance(instruction, Call)})
+        functions = []
+        for entry in entries:
+            names = {}
+            reached = set()
+            pending = [entry]
+            while pending:
+                index = pending.pop()
+                if index in reached or index >= len(self.instructions):
+                    continue
+                reached.add(index)
+                instruction = self.instructions[index]
+                for arg in instruction.args:
+                    if arg.type == DataType.VAR and arg.frame != FrameKind.GLOBAL:
+                        names[arg.name] = None
+                if isinstance(instruction, (Jump, JumpIfEq, JumpIfNeq)):
+                    pending.append(instruction.target)
+                if not isinstance(instruction, (Jump, Return, Exit)):
+                    pending.append(index + 1)
+            functions.append(list(names))
+        return functions
+
+    def _resolve_labels(self):
+        labels = {}
+        # Map label names to instruction indexes
+        for index, instruction in enumerate(self.instructions):
+            if isinstance(instruction, Label):
+                labels[instruction.args[0].value] = index
+        # Bind jump instructions directly to their targets
+        for instruction in self.instructions:
+            if isinstance(instruction, (Call, Jump, JumpIfEq, JumpIfNeq)):
+                if instruction.args[0].value not in labels:
+                    exit_program(StatusCode.SEMANTIC_ERROR, "Label not found")
+                instruction.target = labels[instruction.args[0].value]
+        return labels
@@ -0,0 +1,83 @@
+"""Input reader"""
+
+import codecs
+import io
+import os
+import stat
+
+
+class InputReader:
+    """Reader of program input lines
+
+    Regular files and in-memory input are read in large chunks and split
+    into lines on demand. Terminals, pipes and sockets are read only as far
+    as data is available, so READ does not block on data the user or the
+    writing process has not sent yet.
+    """
+
+    # Number of characters read at once
+    CHUNK_SIZE = 1 << 16
+
+    def __init__(self, file):
+        self._file = file
+        self._lines = []
+        self._position = 0
+        self._rest = ""
+        self._eof = False
+        self._stream = _stream(file)
+        # Input which may wait for its writer, who may wait for prompts first
+        self.interactive = self._stream is not None
+        if self._stream is not None:
+            # Decoded as the text file would, including its newline translation
+            self._decoder = io.IncrementalNewlineDecoder(
+                codecs.getincrementaldecoder(file.encoding)(file.errors), True)
+
+    def read_line(self):
+        """Read line without newline, raise EOFError at end of input"""
+        while self._position >= len(self._lines):
+            if not self._fill():
+                raise EOFError
+        line = self._lines[self._position]
+        self._position += 1
+        return line
+
+    def _fill(self):
+        if self._eof:
+            return False
+        if self._stream is not None:
+            chunk = self._read_available()
+        else:
+            chunk = self._file.read(self.CHUNK_SIZE)
+        if not chunk:
+            self._eof = True
+            # Last line does not have to end with newline
+            if self._rest:
+                self._lines = [self._rest]
+                self._position = 0
+                self._rest = ""
+                return True
+            return False
+        self._lines = (self._rest + chunk).split("\n")
+        self._rest = self._lines.pop()
+        self._position = 0
+        return True
+
+    def _read_available(self):
+        """Read data available in the stream, empty string at its end"""
+        while True:
+            data = self._stream.read1(self.CHUNK_SIZE)
+            chunk = self._decoder.decode(data, final=not data)
+            # Data may end in the middle of a character or of a line break
+            if chunk or not data:
+                return chunk
+
+
+def _stream(file):
+    """Get binary stream of input read as its data arrives, None for regular files"""
+    try:
+        if stat.S_ISREG(os.fstat(file.fileno()).st_mode):
+            return None
+        return file.buffer
+    except (OSError, ValueError, AttributeError):
+        # In-memory input never waits for a writer
+        return None
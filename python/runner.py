@@ -1,44 +1,49 @@
 """Code runner"""
 from frame import FrameManager
-from error import StatusCode, exit_program
+from hooks import run_hooked
+from output import stdout
+from reader import InputReader
 from stack import Stack
-from instructions import Label, instruction_factory
-from validate import validate_xml
 
 
 class Runner:
     """Code runner"""
 
-    def __init__(self, xml):
-        self.instructions = self._parse_instructions(xml)
+    def __init__(self, program, input_file):
+        self.input = InputReader(input_file)
+        self.instructions = program.instructions
+        self.labels = program.labels
+        # Decoded literals, indexed by their arguments
+        self.constants = program.constants.values
+        # Bind instructions to this runner
+        for instruction in self.instructions:
+            instruction.bind(self)
         self.done = False
-        self.frames = FrameManager()
+        self.frames = FrameManager(program.global_layout)
         self.stack = Stack()
         self.call_stack = Stack()
         self.instruction_pointer = 0
         self.next_ip = 0
+        self.hooks = []
+
+    def set_input(self, input_file):
+        """Replace input of the program before it runs"""
+        self.input = InputReader(input_file)
+
+    def add_hook(self, hook):
+        """Register execution hook, see hooks.Hook"""
+        self.hooks.append(hook)
 
     def run(self):
         """Run the code"""
+        if self.hooks:
+            run_hooked(self)
+            return
         while not self.done:
             self.next_ip = self.instruction_pointer + 1
             self._execute()
             self.instruction_pointer = self.next_ip
-
-    def check_label_exists(self, label):
-        """Check if label exists"""
-        for instruction in self.instructions:
-            if isinstance(instruction, Label) and instruction.args[0].value == label:
-                return
-        exit_program(StatusCode.SEMANTIC_ERROR, "Label not found")
-
-    def jump_to_label(self, label):
-        """Jump to label"""
-        for index, instruction in enumerate(self.instructions):
-            if isinstance(instruction, Label) and instruction.args[0].value == label:
-                self.next_ip = index
-                return
-        exit_program(StatusCode.SEMANTIC_ERROR, "Label not found")
+        stdout.flush()
 
     def _execute(self):
         # If instruction pointer is out of range, end the program
@@ -46,14 +51,3 @@ class Runner:
             self.done = True
         else:
             self.instructions[self.instruction_pointer].execute()
-
-    def _parse_instructions(self, xml):
-        validate_xml(xml)
-        instructions = []
-        # Parse and create instructions
-        for instruction in xml.findall("instruction"):
-            instructions.append(instruction_factory(instruction, self))
-        # Sort instructions by order
-        instructions = sorted(
-            instructions, key=lambda instruction: instruction.order)
-        return instructions
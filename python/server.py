@@ -0,0 +1,167 @@
+"""
+Resident IPPcode23 interpreter server
+
+The server imports the interpreter once and runs every request in a
+forked child, so requests pay neither the startup of Python nor imports,
+and no state of one run can leak to another. Requests are sent by the
+ipp-client program built from client.c, or by client.py, both of which
+have the same command line interface as interpret.py.
+"""
+
+import importlib
+import os
+import signal
+import socket
+import stat
+import sys
+import traceback
+from arguments import Parser
+from error import StatusCode, exit_program
+from validate import LazyPattern
+import interpret
+import instruction
+import validate
+
+# Modules imported by interpret.py only when they are used
+PRELOADED = ("cache", "compiler", "coverage_map", "inference", "optimizer",
+             "profiler", "stats", "threaded", "tracing")
+
+# Size of the first chunk of request, which carries the file descriptors
+CHUNK_SIZE = 1 << 16
+# Standard input, output and error of the client
+DESCRIPTORS = 3
+
+
+class Server:
+    """Server listening on a Unix domain socket
+
+    A request carries standard input, output and error of the client as
+    file descriptors, and the working directory and arguments of the
+    client separated by null characters. The child running the request
+    writes directly to the client's output and error, and replies with
+    the exit code.
+    """
+
+    def __init__(self, path):
+        self.path = path
+
+    def serve(self):
+        """Accept requests until the server is interrupted or terminated"""
+        _preload()
+        # Children are reaped automatically
+        signal.signal(signal.SIGCHLD, signal.SIG_IGN)
+        signal.signal(signal.SIGTERM, _terminate)
+        _remove_stale_socket(self.path)
+        with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as listener:
+            listener.bind(self.path)
+            listener.listen()
+            try:
+                while True:
+                    (connection, _) = listener.accept()
+                    with connection:
+                        # Nothing buffered may be written twice by children
+                        sys.stdout.flush()
+                        sys.stderr.flush()
+                        if os.fork() == 0:
+                            listener.close()
+                            os._exit(self._handle(connection))
+            except KeyboardInterrupt:
+                pass
+            finally:
+                os.unlink(self.path)
+
+    def _handle(self, connection):
+        """Run one request in the child and reply with its exit code"""
+        signal.signal(signal.SIGCHLD, signal.SIG_DFL)
+        signal.signal(signal.SIGTERM, signal.SIG_DFL)
+        try:
+            (data, descriptors, _, _) = socket.recv_fds(
+                connection, CHUNK_SIZE, DESCRIPTORS)
+            while True:
+                chunk = connection.recv(CHUNK_SIZE)
+                if not chunk:
+                    break
+                data += chunk
+            request = data.decode("utf-8", "surrogateescape").split("\0")
+            if len(descriptors) != DESCRIPTORS:
+                raise ValueError("Missing standard streams of client")
+        except (OSError, ValueError):
+            return 1
+        for (target, descriptor) in enumerate(descriptors):
+            os.dup2(descriptor, target)
+            os.close(descriptor)
+        status = self._run(request)
+        try:
+            connection.sendall(str(status).encode("ascii"))
+        except OSError:
+            pass
+        return 0
+
+    @staticmethod
+    def _run(request):
+        """Run the interpreter as interpret.py would, get its exit code"""
+        status = 0
+        try:
+            os.chdir(request[0])
+            sys.argv = ["interpret.py"] + request[1:]
+            interpret.main()
+        except SystemExit as exit_:
+            if exit_.code is None:
+                status = 0
+            elif isinstance(exit_.code, int):
+                status = exit_.code
+            else:
+                print(exit_.code, file=sys.stderr)
+                status = 1
+        except Exception:  # pylint: disable=broad-except
+            traceback.print_exc()
+            status = 1
+        sys.stdout.flush()
+        sys.stderr.flush()
+        return status
+
+
+def _preload():
+    """Import all modules and compile all patterns, so children share them"""
+    for module in PRELOADED:
+        importlib.import_module(module)
+    for module in (instruction, validate):
+        for value in vars(module).values():
+            if isinstance(value, LazyPattern):
+                value.compile()
+
+
+def _remove_stale_socket(path):
+    """Remove socket left by a server which is not running anymore
+
+    Anything else at the path, including a socket of a running server, is
+    kept and the server does not start.
+    """
+    try:
+        mode = os.lstat(path).st_mode
+    except FileNotFoundError:
+        return
+    if not stat.S_ISSOCK(mode):
+        exit_program(StatusCode.OUTPUT_ERROR, "Socket path exists and is not a socket")
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as probe:
+        try:
+            probe.connect(path)
+        except ConnectionRefusedError:
+            os.unlink(path)
+            return
+        except OSError:
+            pass
+    exit_program(StatusCode.OUTPUT_ERROR, "Socket is used by another server")
+
+
+def _terminate(signum, frame):
+    """Stop the server on SIGTERM like on interrupt"""
+    raise KeyboardInterrupt
+
+
+if __name__ == "__main__":
+    parser = Parser(description="Resident IPPcode23 interpreter server")
+    parser.add_argument("--socket", metavar="PATH", required=True,
+                        help="path of the Unix domain socket to listen on")
+    args = parser.parse_args()
+    Server(args.socket).serve()
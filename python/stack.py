@@ -6,6 +6,8 @@ from error import StatusCode, exit_program
 class Stack:
     """Stack"""
 
+    __slots__ = ("items",)
+
     def __init__(self):
         self.items = []
 
@@ -0,0 +1,157 @@
+"""Execution statistics"""
+
+import json
+from time import perf_counter_ns
+from value import DataType, UNINITIALIZED
+from error import StatusCode, exit_program
+from hooks import Hook
+import instructions as ins
+
+# Number of instructions listed as the hottest ones
+HOTTEST = 10
+
+
+class StatsHook(Hook):
+    """Execution hook collecting statistics of the run
+
+    Every instruction is counted and timed until the next one starts.
+    Statistics are written when the program ends, also when it ends by
+    EXIT or by an error.
+    """
+
+    def __init__(self, runner, path):
+        self.runner = runner
+        self.path = path
+        instructions = runner.instructions
+        self.counts = [0] * len(instructions)
+        self.times = [0] * len(instructions)
+        # Variables whose initialization each instruction can cause
+        self.destinations = [_destinations(instruction) for instruction in instructions]
+        # Instructions which can throw the temporary frame away
+        self.frame_changes = [isinstance(instruction, (ins.CreateFrame, ins.PopFrame,
+                                                       ins.CreatePushFrame))
+                              for instruction in instructions]
+        # Superinstructions, which also execute the instruction after them
+        self.fused = [isinstance(instruction, ins.Superinstruction)
+                      for instruction in instructions]
+        self.executed = 0
+        self.start = perf_counter_ns()
+        self.time = 0
+        self.initialized = 0
+        self.peak_initialized = 0
+        self.peak_stack = 0
+        self.peak_call_stack = 0
+        # Instruction being executed with state observed before it
+        self.previous = None
+        self.started = 0
+        self.watched = None
+        self.before = None
+        self.temporary_frame = None
+
+    def on_instruction(self, runner, ip, instruction):
+        """Finish statistics of the previous instruction and start the next one"""
+        if self.previous is not None:
+            self._finish(runner)
+        self.previous = ip
+        self.counts[ip] += 1
+        if self.fused[ip]:
+            self.counts[ip + 1] += 1
+        frames = runner.frames
+        self.watched = self.destinations[ip]
+        if self.watched:
+            self.before = [_peek(frames, arg) for arg in self.watched]
+        if self.frame_changes[ip]:
+            self.temporary_frame = frames.temporary_frame
+        self.started = perf_counter_ns()
+
+    def on_end(self, runner, status):
+        """Write the statistics"""
+        if self.previous is not None:
+            self._finish(runner)
+        self.time = perf_counter_ns() - self.start
+        self._write()
+
+    def _finish(self, runner):
+        ip = self.previous
+        self.times[ip] += perf_counter_ns() - self.started
+        frames = runner.frames
+        if self.watched:
+            for (arg, value) in zip(self.watched, self.before):
+                if (value is None or value is UNINITIALIZED) and _initialized(
+                        _peek(frames, arg)):
+                    self.initialized += 1
+        temporary_frame = self.temporary_frame
+        if self.frame_changes[ip] and temporary_frame is not None:
+            if (temporary_frame is not frames.temporary_frame
+                    and temporary_frame is not frames.local_frame):
+                self.initialized -= sum(
+                    1 for value in temporary_frame._variables if _initialized(value))
+        if self.initialized > self.peak_initialized:
+            self.peak_initialized = self.initialized
+        if len(runner.stack.items) > self.peak_stack:
+            self.peak_stack = len(runner.stack.items)
+        if len(runner.call_stack.items) > self.peak_call_stack:
+            self.peak_call_stack = len(runner.call_stack.items)
+
+    def _write(self):
+        instructions = self.runner.instructions
+        opcodes = {}
+        for (instruction, count, time) in zip(instructions, self.counts, self.times):
+            if count:
+                opcode = opcodes.setdefault(instruction.opcode, {"count": 0, "time": 0})
+                opcode["count"] += count
+                opcode["time"] += time
+        hottest = sorted(range(len(instructions)), key=lambda ip: -self.counts[ip])
+        stats = {
+            "executed": sum(self.counts),
+            "time": self.time / 1e9,
+            "opcodes": {
+                opcode: {"count": value["count"], "time": value["time"] / 1e9}
+                for (opcode, value) in sorted(
+                    opcodes.items(), key=lambda item: -item[1]["time"])
+            },
+            "hottest": [
+                {
+                    "order": instructions[ip].order,
+                    "opcode": instructions[ip].opcode,
+                    "count": self.counts[ip],
+                }
+                for ip in hottest[:HOTTEST] if self.counts[ip]
+            ],
+            "peak_initialized_variables": self.peak_initialized,
+            "peak_data_stack": self.peak_stack,
+            "peak_call_stack": self.peak_call_stack,
+        }
+        try:
+            with open(self.path, "w", encoding="utf-8") as file:
+                json.dump(stats, file, indent=2)
+                file.write("\n")
+        except OSError:
+            exit_program(StatusCode.OUTPUT_ERROR, "Output error")
+
+
+def _destinations(instruction):
+    """Get variable operands which can be initialized by instruction"""
+    if isinstance(instruction, ins.Superinstruction):
+        # Both halves of DEFVAR and MOVE name the same variable
+        destinations = _destinations(instruction.first)
+        for arg in _destinations(instruction.second):
+            if all((arg.frame, arg.slot) != (other.frame, other.slot)
+                   for other in destinations):
+                destinations.append(arg)
+        return destinations
+    if instruction.args and instruction.args[0].type == DataType.VAR:
+        return [instruction.args[0]]
+    return []
+
+
+def _peek(frames, arg):
+    """Get value of variable without checks, None if it does not exist"""
+    frame = (frames.global_frame, frames.local_frame, frames.temporary_frame)[arg.frame]
+    if frame is None or arg.slot >= len(frame._variables):
+        return None
+    return frame._variables[arg.slot]
+
+
+def _initialized(value):
+    return value is not None and value is not UNINITIALIZED
@@ -0,0 +1,56 @@
+"""Tests of the batch runner"""
+
+import os
+import sys
+import tempfile
+import time
+import unittest
+from unittest import mock
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import validate
+from batch import TIMEOUT, Task
+
+PROGRAM = """<?xml version="1.0" encoding="UTF-8"?>
+<program language="IPPcode23">
+<instruction order="1" opcode="WRITE"><arg1 type="int">42</arg1></instruction>
+</program>
+"""
+
+
+class SlowPattern:
+    """Pattern taking longer to match than the time limit of the program"""
+
+    def __init__(self, pattern):
+        self.pattern = pattern
+
+    def match(self, text):
+        """Match text after a delay"""
+        time.sleep(1)
+        return self.pattern.match(text)
+
+
+class TimeoutTest(unittest.TestCase):
+    """Time limits of programs"""
+
+    def _run(self, timeout):
+        with tempfile.TemporaryDirectory() as directory:
+            with open(os.path.join(directory, "program.src"), "w", encoding="utf-8") as file:
+                file.write(PROGRAM)
+            return Task(directory, "program", os.path.join(directory, "output"),
+                        False, "classic", timeout).run()
+
+    def test_timeout_while_validating(self):
+        # The time limit runs out inside the validator, which catches exceptions
+        with mock.patch.object(validate, "INT_RE", SlowPattern(validate.INT_RE)):
+            result = self._run(0.1)
+        self.assertEqual(result.status, TIMEOUT)
+
+    def test_no_timeout(self):
+        result = self._run(10)
+        self.assertEqual(result.status, 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,48 @@
+"""Tests of the on-disk cache of loaded programs"""
+
+import io
+import os
+import sys
+import tempfile
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from cache import ProgramCache
+from program import Program
+
+PROGRAM = """<?xml version="1.0" encoding="UTF-8"?>
+<program language="IPPcode23">
+<instruction order="1" opcode="WRITE"><arg1 type="int">42</arg1></instruction>
+</program>
+"""
+
+
+class Unpicklable:
+    """Object which cannot be stored in the cache"""
+
+    def __reduce__(self):
+        raise TypeError("cannot pickle")
+
+
+class ProgramCacheTest(unittest.TestCase):
+    """Storing and loading cache entries"""
+
+    def test_store_and_load(self):
+        with tempfile.TemporaryDirectory() as directory:
+            cache = ProgramCache(directory)
+            cache.store(PROGRAM, Program(io.StringIO(PROGRAM)))
+            program = cache.load(PROGRAM)
+            self.assertEqual([instruction.opcode for instruction in program.instructions],
+                             ["WRITE"])
+
+    def test_failed_store(self):
+        with tempfile.TemporaryDirectory() as directory:
+            cache = ProgramCache(directory)
+            cache.store(PROGRAM, Unpicklable())
+            self.assertEqual(os.listdir(directory), [])
+            self.assertIsNone(cache.load(PROGRAM))
+
+
+if __name__ == "__main__":
+    unittest.main()
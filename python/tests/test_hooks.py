@@ -0,0 +1,55 @@
+"""Tests of execution hooks"""
+
+import io
+import os
+import sys
+import unittest
+from unittest import mock
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import instructions as ins
+from error import StatusCode
+from hooks import Hook
+from program import Program
+from runner import Runner
+
+PROGRAM = """<?xml version="1.0" encoding="UTF-8"?>
+<program language="IPPcode23">
+<instruction order="1" opcode="EXIT"><arg1 type="int">7</arg1></instruction>
+</program>
+"""
+
+
+class EndHook(Hook):
+    """Hook recording the status the program ended with"""
+
+    def __init__(self):
+        self.status = None
+
+    def on_end(self, runner, status):
+        self.status = status
+
+
+class HooksTest(unittest.TestCase):
+    """Statuses passed to on_end"""
+
+    def setUp(self):
+        self.hook = EndHook()
+        self.runner = Runner(Program(io.StringIO(PROGRAM)), io.StringIO(""))
+        self.runner.add_hook(self.hook)
+
+    def test_exit(self):
+        with self.assertRaises(SystemExit):
+            self.runner.run()
+        self.assertEqual(self.hook.status, 7)
+
+    def test_crash(self):
+        with mock.patch.object(ins.Exit, "execute", side_effect=RuntimeError):
+            with self.assertRaises(RuntimeError):
+                self.runner.run()
+        self.assertEqual(self.hook.status, StatusCode.INTERNAL_ERROR.value)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,53 @@
+"""Tests of runs over many input files"""
+
+import io
+import os
+import sys
+import tempfile
+import unittest
+from unittest import mock
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import instructions as ins
+from error import StatusCode
+from multirun import MultiRunner
+from program import Program
+from runner import Runner
+
+PROGRAM = """<?xml version="1.0" encoding="UTF-8"?>
+<program language="IPPcode23">
+<instruction order="1" opcode="WRITE"><arg1 type="int">42</arg1></instruction>
+<instruction order="2" opcode="EXIT"><arg1 type="int">3</arg1></instruction>
+</program>
+"""
+
+
+class MultiRunnerTest(unittest.TestCase):
+    """Output and exit codes written for every input"""
+
+    def _run(self, directory):
+        path = os.path.join(directory, "input")
+        with open(path, "w", encoding="utf-8"):
+            pass
+        runner = Runner(Program(io.StringIO(PROGRAM)), io.StringIO(""))
+        MultiRunner(runner, runner, 1).run([path])
+        with open(path + ".stdout", "r", encoding="utf-8") as file:
+            output = file.read()
+        with open(path + ".rc", "r", encoding="utf-8") as file:
+            status = int(file.read())
+        return (output, status)
+
+    def test_exit(self):
+        with tempfile.TemporaryDirectory() as directory:
+            self.assertEqual(self._run(directory), ("42", 3))
+
+    def test_crash(self):
+        with tempfile.TemporaryDirectory() as directory, \
+                mock.patch.object(ins.Exit, "execute", side_effect=RuntimeError):
+            self.assertEqual(self._run(directory),
+                             ("42", StatusCode.INTERNAL_ERROR.value))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,101 @@
+"""Tests of the input reader"""
+
+import os
+import subprocess
+import sys
+import tempfile
+import threading
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from reader import InputReader
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Prompt for numbers and write them back until zero is read
+DIALOG = """<?xml version="1.0" encoding="UTF-8"?>
+<program language="IPPcode23">
+<instruction order="1" opcode="DEFVAR"><arg1 type="var">GF@a</arg1></instruction>
+<instruction order="2" opcode="LABEL"><arg1 type="label">loop</arg1></instruction>
+<instruction order="3" opcode="WRITE"><arg1 type="string">?\\010</arg1></instruction>
+<instruction order="4" opcode="READ"><arg1 type="var">GF@a</arg1><arg2 type="type">int</arg2></instruction>
+<instruction order="5" opcode="JUMPIFEQ"><arg1 type="label">end</arg1><arg2 type="var">GF@a</arg2><arg3 type="int">0</arg3></instruction>
+<instruction order="6" opcode="WRITE"><arg1 type="var">GF@a</arg1></instruction>
+<instruction order="7" opcode="WRITE"><arg1 type="string">\\010</arg1></instruction>
+<instruction order="8" opcode="JUMP"><arg1 type="label">loop</arg1></instruction>
+<instruction order="9" opcode="LABEL"><arg1 type="label">end</arg1></instruction>
+</program>
+"""
+
+
+class InputReaderTest(unittest.TestCase):
+    """Reading lines of regular files and pipes"""
+
+    def _read_lines(self, reader, count):
+        """Read lines in a thread, get None if they are not available in time"""
+        lines = []
+        thread = threading.Thread(
+            target=lambda: lines.extend(reader.read_line() for _ in range(count)),
+            daemon=True)
+        thread.start()
+        thread.join(2)
+        return None if thread.is_alive() else lines
+
+    def test_regular_file(self):
+        with tempfile.TemporaryFile("w+", encoding="utf-8") as file:
+            file.write("first\r\nsecond\nlast")
+            file.seek(0)
+            reader = InputReader(file)
+            self.assertEqual(self._read_lines(reader, 3), ["first", "second", "last"])
+            self.assertRaises(EOFError, reader.read_line)
+
+    def test_pipe_line_by_line(self):
+        (read_end, write_end) = os.pipe()
+        with open(read_end, "r", encoding="utf-8") as file, open(write_end, "wb") as writer:
+            reader = InputReader(file)
+            # Writer keeps the pipe open and waits for the answer
+            writer.write(b"first\n")
+            writer.flush()
+            self.assertEqual(self._read_lines(reader, 1), ["first"])
+            # Character and line break split between writes
+            writer.write("č\r".encode("utf-8")[:1])
+            writer.flush()
+            writer.write("č\r".encode("utf-8")[1:] + b"\n")
+            writer.flush()
+            self.assertEqual(self._read_lines(reader, 1), ["č"])
+            writer.write(b"last")
+            writer.close()
+            self.assertEqual(self._read_lines(reader, 1), ["last"])
+            self.assertRaises(EOFError, reader.read_line)
+
+    def test_prompts_over_pipes(self):
+        with tempfile.TemporaryDirectory() as directory:
+            source = os.path.join(directory, "program.src")
+            with open(source, "w", encoding="utf-8") as file:
+                file.write(DIALOG)
+            process = subprocess.Popen(
+                [sys.executable, os.path.join(ROOT, "interpret.py"), "--source=" + source],
+                stdin=subprocess.PIPE, stdout=subprocess.PIPE)
+            dialog = []
+
+            def answer():
+                # Prompt, answer to the number written and the next prompt
+                dialog.append(process.stdout.readline())
+                process.stdin.write(b"3\n")
+                process.stdin.flush()
+                dialog.append(process.stdout.readline())
+                dialog.append(process.stdout.readline())
+
+            thread = threading.Thread(target=answer, daemon=True)
+            thread.start()
+            thread.join(5)
+            process.kill()
+            process.wait()
+            process.stdin.close()
+            process.stdout.close()
+            self.assertEqual(dialog, [b"?\n", b"3\n", b"?\n"])
+
+
+if __name__ == "__main__":
+    unittest.main()
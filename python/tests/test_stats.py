@@ -0,0 +1,52 @@
+"""Tests of execution statistics"""
+
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import unittest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Two DEFVAR and MOVE pairs, fused into superinstructions by -O
+DEFVAR_MOVE = """<?xml version="1.0" encoding="UTF-8"?>
+<program language="IPPcode23">
+<instruction order="1" opcode="DEFVAR"><arg1 type="var">GF@a</arg1></instruction>
+<instruction order="2" opcode="MOVE"><arg1 type="var">GF@a</arg1><arg2 type="int">1</arg2></instruction>
+<instruction order="3" opcode="DEFVAR"><arg1 type="var">GF@b</arg1></instruction>
+<instruction order="4" opcode="MOVE"><arg1 type="var">GF@b</arg1><arg2 type="int">2</arg2></instruction>
+</program>
+"""
+
+
+class StatsTest(unittest.TestCase):
+    """Statistics written by --stats"""
+
+    def _stats(self, *options):
+        with tempfile.TemporaryDirectory() as directory:
+            source = os.path.join(directory, "program.src")
+            stats = os.path.join(directory, "stats.json")
+            with open(source, "w", encoding="utf-8") as file:
+                file.write(DEFVAR_MOVE)
+            subprocess.run([sys.executable, os.path.join(ROOT, "interpret.py"),
+                            "--source=" + source, "--input=" + os.devnull,
+                            "--stats=" + stats, *options], check=True)
+            with open(stats, "r", encoding="utf-8") as file:
+                return json.load(file)
+
+    def test_defvar_move(self):
+        stats = self._stats()
+        self.assertEqual(stats["executed"], 4)
+        self.assertEqual(stats["peak_initialized_variables"], 2)
+
+    def test_defvar_move_optimized(self):
+        stats = self._stats("-O")
+        self.assertEqual(stats["executed"], 4)
+        self.assertEqual(stats["peak_initialized_variables"], 2)
+        self.assertEqual(stats["opcodes"]["DEFVAR"]["count"], 2)
+        self.assertEqual(stats["opcodes"]["MOVE"]["count"], 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,35 @@
+"""Tests of the tracing engine"""
+
+import io
+import os
+import sys
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import instructions as ins
+from program import Program
+from runner import Runner
+from tracing import TraceCompiler
+
+# Loop made only of a label and a jump back to it
+EMPTY_LOOP = """<?xml version="1.0" encoding="UTF-8"?>
+<program language="IPPcode23">
+<instruction order="1" opcode="LABEL"><arg1 type="label">loop</arg1></instruction>
+<instruction order="2" opcode="JUMP"><arg1 type="label">loop</arg1></instruction>
+</program>
+"""
+
+
+class TraceCompilerTest(unittest.TestCase):
+    """Compilation of recorded loops"""
+
+    def test_empty_loop(self):
+        runner = Runner(Program(io.StringIO(EMPTY_LOOP)), io.StringIO(""))
+        (label, jump) = runner.instructions
+        recorded = [(0, ins.Label, label, {}, 1), (1, ins.Jump, jump, {}, 0)]
+        self.assertIsNotNone(TraceCompiler(runner, 0, recorded).compile())
+
+
+if __name__ == "__main__":
+    unittest.main()
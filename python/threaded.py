@@ -0,0 +1,517 @@
+"""Direct-threaded execution engine"""
+
+import sys
+import operator
+from value import DataType, NIL, UNINITIALIZED
+from frame import FrameKind
+from error import StatusCode, exit_program
+from output import stdout
+import instructions as ins
+
+
+class ThreadedEngine:
+    """Execution engine running a program lowered to closures
+
+    Every instruction is turned at load time into a closure which takes
+    its own index and returns the index of the next instruction. Operands
+    are bound to direct accessors, so executing a step does not go back
+    through the runner for anything but shared state (frames and stacks).
+    """
+
+    def __init__(self, runner):
+        self.runner = runner
+        self.builders = {
+            ins.Move: self._move,
+            ins.CreateFrame: self._create_frame,
+            ins.PushFrame: self._push_frame,
+            ins.PopFrame: self._pop_frame,
+            ins.DefVar: self._defvar,
+            ins.Call: self._call,
+            ins.Return: self._return,
+            ins.PushS: self._pushs,
+            ins.PopS: self._pops,
+            ins.Add: self._arithmetic,
+            ins.Sub: self._arithmetic,
+            ins.Mul: self._arithmetic,
+            ins.IDiv: self._idiv,
+            ins.Lt: self._relational,
+            ins.Gt: self._relational,
+            ins.Eq: self._eq,
+            ins.And: self._logical,
+            ins.Or: self._logical,
+            ins.Not: self._not,
+            ins.Write: self._write,
+            ins.Concat: self._concat,
+            ins.StrLen: self._strlen,
+            ins.Label: self._label,
+            ins.Jump: self._jump,
+            ins.JumpIfEq: self._conditional_jump,
+            ins.JumpIfNeq: self._conditional_jump,
+            ins.Exit: self._exit,
+            ins.UncheckedAdd: self._unchecked_binary,
+            ins.UncheckedSub: self._unchecked_binary,
+            ins.UncheckedMul: self._unchecked_binary,
+            ins.UncheckedIDiv: self._unchecked_idiv,
+            ins.UncheckedLt: self._unchecked_binary,
+            ins.UncheckedGt: self._unchecked_binary,
+            ins.UncheckedEq: self._unchecked_binary,
+            ins.UncheckedAnd: self._unchecked_binary,
+            ins.UncheckedOr: self._unchecked_binary,
+            ins.UncheckedNot: self._unchecked_not,
+            ins.UncheckedConcat: self._unchecked_binary,
+            ins.UncheckedJumpIfEq: self._unchecked_conditional_jump,
+            ins.UncheckedJumpIfNeq: self._unchecked_conditional_jump,
+            ins.Superinstruction: self._superinstruction,
+            ins.PushPopS: self._superinstruction,
+            ins.CreatePushFrame: self._superinstruction,
+            ins.DefVarMove: self._superinstruction,
+            ins.CompareJump: self._superinstruction,
+        }
+        self.code = [self.lower(instruction)
+                     for instruction in runner.instructions]
+
+    def run(self):
+        """Run the code"""
+        code = self.code
+        end = len(code)
+        ip = 0
+        while ip < end:
+            ip = code[ip](ip)
+        self.runner.done = True
+        stdout.flush()
+
+    def lower(self, instruction):
+        """Lower instruction to a closure returning the next index"""
+        builder = self.builders.get(type(instruction), self._generic)
+        return builder(instruction)
+
+    def _generic(self, instruction):
+        runner = self.runner
+        execute = instruction.execute
+
+        def step(ip):
+            runner.instruction_pointer = ip
+            runner.next_ip = ip + 1
+            execute()
+            return runner.next_ip
+        return step
+
+    # Operand accessors
+
+    def _target(self, arg):
+        """Accessor returning the variables of the frame holding a destination"""
+        frames = self.runner.frames
+        slot = arg.slot
+        if arg.frame == FrameKind.GLOBAL:
+            variables = frames.global_frame._variables
+
+            def get_global():
+                if variables[slot] is None:
+                    exit_program(StatusCode.MISSING_VAR, "Variable not found")
+                return variables
+            return get_global
+        if arg.frame == FrameKind.LOCAL:
+            def get_local():
+                frame = frames.local_frame
+                if frame is None:
+                    exit_program(StatusCode.MISSING_FRAME,
+                                 "No frames in stack")
+                variables = frame._variables
+                if slot >= len(variables) or variables[slot] is None:
+                    exit_program(StatusCode.MISSING_VAR, "Variable not found")
+                return variables
+            return get_local
+
+        def get_temporary():
+            frame = frames.temporary_frame
+            if frame is None:
+                exit_program(StatusCode.MISSING_FRAME, "No temporary frame")
+            variables = frame._variables
+            if slot >= len(variables) or variables[slot] is None:
+                exit_program(StatusCode.MISSING_VAR, "Variable not found")
+            return variables
+        return get_temporary
+
+    def _ref(self, arg):
+        """Accessor returning the value (or constant) of an operand"""
+        return self._accessor(arg, None)
+
+    def _value(self, arg):
+        """Accessor returning an operand which has to be initialized"""
+        return self._accessor(arg, UNINITIALIZED)
+
+    def _accessor(self, arg, missing):
+        if arg.type != DataType.VAR:
+            constant = self.runner.constants[arg.index]
+            return lambda: constant
+        frames = self.runner.frames
+        slot = arg.slot
+        if arg.frame == FrameKind.GLOBAL:
+            variables = frames.global_frame._variables
+
+            def get_global():
+                value = variables[slot]
+                if value is None or value is missing:
+                    _missing(value)
+                return value
+            return get_global
+        if arg.frame == FrameKind.LOCAL:
+            def get_local():
+                frame = frames.local_frame
+                if frame is None:
+                    exit_program(StatusCode.MISSING_FRAME,
+                                 "No frames in stack")
+                try:
+                    value = frame._variables[slot]
+                except IndexError:
+                    value = None
+                if value is None or value is missing:
+                    _missing(value)
+                return value
+            return get_local
+
+        def get_temporary():
+            frame = frames.temporary_frame
+            if frame is None:
+                exit_program(StatusCode.MISSING_FRAME, "No temporary frame")
+            try:
+                value = frame._variables[slot]
+            except IndexError:
+                value = None
+            if value is None or value is missing:
+                _missing(value)
+            return value
+        return get_temporary
+
+    # Builders
+
+    def _move(self, instruction):
+        dst = self._target(instruction.args[0])
+        slot = instruction.args[0].slot
+        src = self._value(instruction.args[1])
+
+        def move(ip):
+            variables = dst()
+            variables[slot] = src()
+            return ip + 1
+        return move
+
+    def _create_frame(self, instruction):
+        create_frame = self.runner.frames.create_frame
+
+        def create(ip):
+            create_frame()
+            return ip + 1
+        return create
+
+    def _push_frame(self, instruction):
+        push_frame = self.runner.frames.local_frames.push_frame
+
+        def push(ip):
+            push_frame()
+            return ip + 1
+        return push
+
+    def _pop_frame(self, instruction):
+        pop_frame = self.runner.frames.local_frames.pop_frame
+
+        def pop(ip):
+            pop_frame()
+            return ip + 1
+        return pop
+
+    def _defvar(self, instruction):
+        create_variable = self.runner.frames.create_variable
+        (kind, slot) = (instruction.args[0].frame, instruction.args[0].slot)
+
+        def defvar(ip):
+            create_variable(kind, slot)
+            return ip + 1
+        return defvar
+
+    def _call(self, instruction):
+        push = self.runner.call_stack.push
+        target = instruction.target
+
+        def call(ip):
+            push(ip + 1)
+            return target
+        return call
+
+    def _return(self, instruction):
+        pop = self.runner.call_stack.pop
+
+        def ret(ip):
+            return pop()
+        return ret
+
+    def _pushs(self, instruction):
+        push = self.runner.stack.push
+        src = self._value(instruction.args[0])
+
+        def pushs(ip):
+            push(src())
+            return ip + 1
+        return pushs
+
+    def _pops(self, instruction):
+        pop = self.runner.stack.pop
+        dst = self._target(instruction.args[0])
+        slot = instruction.args[0].slot
+
+        def pops(ip):
+            variables = dst()
+            variables[slot] = pop()
+            return ip + 1
+        return pops
+
+    def _operands(self, instruction):
+        return (self._target(instruction.args[0]),
+                instruction.args[0].slot,
+                self._value(instruction.args[1]),
+                self._value(instruction.args[2]))
+
+    def _arithmetic(self, instruction):
+        (dst, slot, left, right) = self._operands(instruction)
+        operation = {
+            ins.Add: int.__add__,
+            ins.Sub: int.__sub__,
+            ins.Mul: int.__mul__,
+        }[type(instruction)]
+
+        def arithmetic(ip):
+            variables = dst()
+            a = left()
+            b = right()
+            if type(a) is not int or type(b) is not int:
+                exit_program(StatusCode.INVALID_TYPE, "Invalid argument type")
+            variables[slot] = operation(a, b)
+            return ip + 1
+        return arithmetic
+
+    def _idiv(self, instruction):
+        (dst, slot, left, right) = self._operands(instruction)
+
+        def idiv(ip):
+            variables = dst()
+            a = left()
+            b = right()
+            if type(a) is not int or type(b) is not int:
+                exit_program(StatusCode.INVALID_TYPE, "Invalid argument type")
+            if b == 0:
+                exit_program(StatusCode.INVALID_VALUE, "Division by zero")
+            variables[slot] = a // b
+            return ip + 1
+        return idiv
+
+    def _relational(self, instruction):
+        (dst, slot, left, right) = self._operands(instruction)
+        less = isinstance(instruction, ins.Lt)
+
+        def relational(ip):
+            variables = dst()
+            a = left()
+            b = right()
+            if type(a) is not type(b) or a is NIL:
+                exit_program(StatusCode.INVALID_TYPE, "Invalid argument type")
+            variables[slot] = a < b if less else a > b
+            return ip + 1
+        return relational
+
+    def _eq(self, instruction):
+        (dst, slot, left, right) = self._operands(instruction)
+
+        def eq(ip):
+            variables = dst()
+            a = left()
+            b = right()
+            if type(a) is not type(b) and a is not NIL and b is not NIL:
+                exit_program(StatusCode.INVALID_TYPE, "Invalid argument type")
+            variables[slot] = a == b
+            return ip + 1
+        return eq
+
+    def _logical(self, instruction):
+        (dst, slot, left, right) = self._operands(instruction)
+        conjunction = isinstance(instruction, ins.And)
+
+        def logical(ip):
+            variables = dst()
+            a = left()
+            b = right()
+            if type(a) is not bool or type(b) is not bool:
+                exit_program(StatusCode.INVALID_TYPE, "Invalid argument type")
+            variables[slot] = (a and b) if conjunction else (a or b)
+            return ip + 1
+        return logical
+
+    def _not(self, instruction):
+        dst = self._target(instruction.args[0])
+        slot = instruction.args[0].slot
+        src = self._value(instruction.args[1])
+
+        def negation(ip):
+            variables = dst()
+            a = src()
+            if type(a) is not bool:
+                exit_program(StatusCode.INVALID_TYPE, "Invalid argument type")
+            variables[slot] = not a
+            return ip + 1
+        return negation
+
+    def _write(self, instruction):
+        src = self._value(instruction.args[0])
+        write_output = stdout.write
+
+        def write(ip):
+            a = src()
+            if type(a) is bool:
+                write_output("true" if a else "false")
+            elif a is not NIL:
+                write_output(str(a))
+            return ip + 1
+        return write
+
+    def _concat(self, instruction):
+        (dst, slot, left, right) = self._operands(instruction)
+
+        def concat(ip):
+            variables = dst()
+            a = left()
+            b = right()
+            if type(a) is not str or type(b) is not str:
+                exit_program(StatusCode.INVALID_TYPE, "Invalid argument type")
+            variables[slot] = a + b
+            return ip + 1
+        return concat
+
+    def _strlen(self, instruction):
+        dst = self._target(instruction.args[0])
+        slot = instruction.args[0].slot
+        src = self._value(instruction.args[1])
+
+        def strlen(ip):
+            variables = dst()
+            a = src()
+            if type(a) is not str:
+                exit_program(StatusCode.INVALID_TYPE, "Invalid argument type")
+            variables[slot] = len(a)
+            return ip + 1
+        return strlen
+
+    # Builders of instructions with operand types proven at load time
+
+    def _unchecked_operands(self, instruction):
+        return ((self._target(instruction.args[0]), instruction.args[0].slot)
+                + tuple(self._ref(arg) for arg in instruction.args[1:]))
+
+    def _unchecked_binary(self, instruction):
+        (dst, slot, left, right) = self._unchecked_operands(instruction)
+        operation = {
+            ins.UncheckedAdd: operator.add,
+            ins.UncheckedSub: operator.sub,
+            ins.UncheckedMul: operator.mul,
+            ins.UncheckedLt: operator.lt,
+            ins.UncheckedGt: operator.gt,
+            ins.UncheckedEq: operator.eq,
+            ins.UncheckedAnd: lambda a, b: a and b,
+            ins.UncheckedOr: lambda a, b: a or b,
+            ins.UncheckedConcat: operator.add,
+        }[type(instruction)]
+
+        def binary(ip):
+            variables = dst()
+            variables[slot] = operation(left(), right())
+            return ip + 1
+        return binary
+
+    def _unchecked_idiv(self, instruction):
+        (dst, slot, left, right) = self._unchecked_operands(instruction)
+
+        def idiv(ip):
+            variables = dst()
+            a = left()
+            b = right()
+            if b == 0:
+                exit_program(StatusCode.INVALID_VALUE, "Division by zero")
+            variables[slot] = a // b
+            return ip + 1
+        return idiv
+
+    def _unchecked_not(self, instruction):
+        (dst, slot, src) = self._unchecked_operands(instruction)
+
+        def negation(ip):
+            variables = dst()
+            variables[slot] = not src()
+            return ip + 1
+        return negation
+
+    def _unchecked_conditional_jump(self, instruction):
+        left = self._ref(instruction.args[1])
+        right = self._ref(instruction.args[2])
+        target = instruction.target
+        equal = isinstance(instruction, ins.JumpIfEq)
+
+        def conditional_jump(ip):
+            if (left() == right()) is equal:
+                return target
+            return ip + 1
+        return conditional_jump
+
+    def _superinstruction(self, instruction):
+        first = self.lower(instruction.first)
+        second = self.lower(instruction.second)
+
+        def superinstruction(ip):
+            return second(first(ip))
+        return superinstruction
+
+    def _label(self, instruction):
+        def label(ip):
+            return ip + 1
+        return label
+
+    def _jump(self, instruction):
+        target = instruction.target
+
+        def jump(ip):
+            return target
+        return jump
+
+    def _conditional_jump(self, instruction):
+        left = self._value(instruction.args[1])
+        right = self._value(instruction.args[2])
+        target = instruction.target
+        equal = isinstance(instruction, ins.JumpIfEq)
+
+        def conditional_jump(ip):
+            a = left()
+            b = right()
+            if type(a) is not type(b) and a is not NIL and b is not NIL:
+                exit_program(StatusCode.INVALID_TYPE, "Invalid argument type")
+            if (a == b) is equal:
+                return target
+            return ip + 1
+        return conditional_jump
+
+    def _exit(self, instruction):
+        src = self._value(instruction.args[0])
+
+        def exit_code(ip):
+            a = src()
+            if type(a) is not int:
+                exit_program(StatusCode.INVALID_TYPE, "Invalid argument type")
+            if a < 0 or a > 49:
+                exit_program(StatusCode.INVALID_VALUE,
+                             "Invalid argument value")
+            stdout.flush()
+            sys.exit(a)
+        return exit_code
+
+
+def _missing(value):
+    """Exit on a read of an undefined or uninitialized variable"""
+    if value is None:
+        exit_program(StatusCode.MISSING_VAR, "Variable not found")
+    exit_program(StatusCode.MISSING_VALUE, "Variable is not initialized")
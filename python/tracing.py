@@ -0,0 +1,371 @@
+"""Tracing compilation of hot loops"""
+
+from value import DataType, NIL, UNINITIALIZED
+from frame import FrameKind
+from output import stdout
+from compiler import CHECKED, PYTHON_TYPES
+import instructions as ins
+
+# Python types of results of operations
+RESULT_TYPES = {
+    ins.Add: int,
+    ins.Sub: int,
+    ins.Mul: int,
+    ins.IDiv: int,
+    ins.Lt: bool,
+    ins.Gt: bool,
+    ins.Eq: bool,
+    ins.And: bool,
+    ins.Or: bool,
+    ins.Not: bool,
+    ins.Int2Char: str,
+    ins.Stri2Int: int,
+    ins.Concat: str,
+    ins.StrLen: int,
+    ins.GetChar: str,
+    ins.SetChar: str,
+}
+
+# Instructions which can be part of a trace and indexes of operands they read
+TRACEABLE = {
+    ins.Move: (1,),
+    ins.Add: (1, 2),
+    ins.Sub: (1, 2),
+    ins.Mul: (1, 2),
+    ins.IDiv: (1, 2),
+    ins.Lt: (1, 2),
+    ins.Gt: (1, 2),
+    ins.Eq: (1, 2),
+    ins.And: (1, 2),
+    ins.Or: (1, 2),
+    ins.Not: (1,),
+    ins.Int2Char: (1,),
+    ins.Stri2Int: (1, 2),
+    ins.Concat: (1, 2),
+    ins.StrLen: (1,),
+    ins.GetChar: (1, 2),
+    ins.SetChar: (0, 1, 2),
+    ins.Write: (0,),
+    ins.Label: (),
+    ins.Jump: (),
+    ins.JumpIfEq: (1, 2),
+    ins.JumpIfNeq: (1, 2),
+}
+
+# Operators of binary operations
+OPERATORS = {
+    ins.Add: "+",
+    ins.Sub: "-",
+    ins.Mul: "*",
+    ins.IDiv: "//",
+    ins.Lt: "<",
+    ins.Gt: ">",
+    ins.Eq: "==",
+    ins.And: "and",
+    ins.Or: "or",
+    ins.Concat: "+",
+}
+
+# Python type names used in guards
+TYPE_NAMES = {int: "int", str: "str", bool: "bool"}
+
+
+class TracingEngine:
+    """Execution engine compiling hot loops to Python functions
+
+    Instructions are executed one by one like in the runner, but every
+    taken backward jump is counted per target. Once a target gets hot, one
+    iteration of the loop starting there is recorded together with types
+    of all operands and compiled to a function specialized to those types.
+    Guards on entry check the types, the function then keeps iterating
+    until a branch goes another way than when recorded (or an instruction
+    would fail) and returns the index where the runner continues.
+    """
+
+    # Taken backward jumps to a target before its loop is traced
+    THRESHOLD = 50
+    # Longest recorded trace
+    MAX_LENGTH = 1000
+
+    def __init__(self, runner):
+        self.runner = runner
+        self.counters = {}
+        # Compiled loops by index of their start
+        self.traces = {}
+        # Loop starts which cannot be traced
+        self.rejected = set()
+
+    def run(self):
+        """Run the code"""
+        runner = self.runner
+        instructions = runner.instructions
+        end = len(instructions)
+        ip = 0
+        while ip < end:
+            runner.instruction_pointer = ip
+            runner.next_ip = ip + 1
+            instructions[ip].execute()
+            next_ip = runner.next_ip
+            if next_ip <= ip:
+                next_ip = self._backward_jump(next_ip)
+            ip = next_ip
+        runner.done = True
+        stdout.flush()
+
+    def _backward_jump(self, target):
+        """Enter loop starting at target, get index to continue from"""
+        trace = self.traces.get(target)
+        if trace is not None:
+            return trace()
+        if target in self.rejected:
+            return target
+        count = self.counters.get(target, 0) + 1
+        self.counters[target] = count
+        if count < self.THRESHOLD:
+            return target
+        return self._record(target)
+
+    def _record(self, start):
+        """Execute one iteration of loop while recording it
+
+        Returns index of the next instruction to execute. Loops which
+        cannot be compiled are rejected, so they are not recorded again.
+        """
+        runner = self.runner
+        instructions = runner.instructions
+        recorded = []
+        ip = start
+        while True:
+            if ip >= len(instructions) or len(recorded) >= self.MAX_LENGTH:
+                break
+            instruction = instructions[ip]
+            # Second instruction of a pair keeps its own index
+            if isinstance(instruction, ins.Superinstruction):
+                instruction = instruction.first
+            kind = CHECKED.get(type(instruction), type(instruction))
+            if kind not in TRACEABLE:
+                break
+            types = self._observe(instruction, TRACEABLE[kind])
+            if types is None:
+                break
+            runner.instruction_pointer = ip
+            runner.next_ip = ip + 1
+            instruction.execute()
+            recorded.append((ip, kind, instruction, types, runner.next_ip))
+            ip = runner.next_ip
+            if ip == start:
+                trace = TraceCompiler(runner, start, recorded).compile()
+                if trace is None:
+                    break
+                self.traces[start] = trace
+                return trace()
+        self.rejected.add(start)
+        return ip
+
+    def _observe(self, instruction, reads):
+        """Get Python types of operands read, None if some is not readable"""
+        frames = self.runner.frames
+        types = {}
+        for index in reads:
+            arg = instruction.args[index]
+            if arg.type != DataType.VAR:
+                continue
+            frame = (frames.global_frame, frames.local_frame,
+                     frames.temporary_frame)[arg.frame]
+            if frame is None or arg.slot >= len(frame._variables):
+                return None
+            value = frame._variables[arg.slot]
+            # Errors are left to the runner, which reports them properly
+            if value is None or value is UNINITIALIZED:
+                return None
+            types[index] = type(value)
+        return types
+
+
+class TraceCompiler:
+    """Compiler of a recorded loop iteration to a Python function
+
+    Variables used in the loop are loaded to local variables on entry
+    after guards check their types, and stored back on every exit. Types
+    within the loop follow from the entry types, so the guards are needed
+    only once, as long as the variables have the same types at the end of
+    an iteration as at its start.
+    """
+
+    def __init__(self, runner, start, recorded):
+        self.runner = runner
+        self.start = start
+        self.recorded = recorded
+        # Local variable names by (frame kind, slot)
+        self.names = {}
+        # Types variables have to have on entry, None if they only have to exist
+        self.entry_types = {}
+        # Types of variables at the current point of the loop
+        self.types = {}
+        # Variables the loop stores to, they are stored back on every exit
+        self.stored = {(instruction.args[0].frame, instruction.args[0].slot)
+                       for (_, kind, instruction, _, _) in recorded
+                       if kind in RESULT_TYPES or kind is ins.Move}
+        for key in sorted(self.stored):
+            self.names[key] = "v%d" % len(self.names)
+
+    def compile(self):
+        """Get function running the loop, None if it cannot be compiled"""
+        body = []
+        for (index, kind, instruction, observed, next_ip) in self.recorded:
+            lines = self._instruction(index, kind, instruction, observed, next_ip)
+            if lines is None:
+                return None
+            body.append("        # %d: %s" % (index, instruction.opcode))
+            body.extend("        " + line for line in lines)
+        # Loop of labels and jumps only does nothing forever
+        if not any(not line.lstrip().startswith("#") for line in body):
+            body.append("        pass")
+        # Types have to be stable, so the guards hold in every iteration
+        for (key, data_type) in self.entry_types.items():
+            if data_type is not None and self.types.get(key) is not data_type:
+                return None
+        lines = ["def trace():"]
+        lines.extend("    " + line for line in self._entry())
+        lines.append("    while True:")
+        lines.extend(body)
+        namespace = {
+            "frames": self.runner.frames,
+            "write": stdout.write,
+            "NIL": NIL,
+        }
+        code = compile("\n".join(lines) + "\n", "<trace at %d>" % self.start, "exec")
+        exec(code, namespace)
+        return namespace["trace"]
+
+    def _entry(self):
+        """Get lines loading variables and checking their types"""
+        lines = []
+        frames = sorted({kind for (kind, slot) in self.names})
+        for kind in frames:
+            if kind == FrameKind.GLOBAL:
+                lines.append("f0 = frames.global_frame._variables")
+                continue
+            frame = "frames.local_frame" if kind == FrameKind.LOCAL else "frames.temporary_frame"
+            lines.append("if %s is None:" % frame)
+            lines.append("    return %d" % self.start)
+            lines.append("f%d = %s._variables" % (kind, frame))
+            # Frames grow only up to the highest slot they define
+            lines.append("if len(f%d) <= %d:" % (kind, max(
+                slot for (frame_kind, slot) in self.names if frame_kind == kind)))
+            lines.append("    return %d" % self.start)
+        for (key, name) in self.names.items():
+            lines.append("%s = f%d[%d]" % (name, key[0], key[1]))
+            data_type = self.entry_types[key]
+            if data_type is None:
+                condition = "%s is None" % name
+            elif data_type is type(NIL):
+                condition = "%s is not NIL" % name
+            else:
+                condition = "type(%s) is not %s" % (name, TYPE_NAMES[data_type])
+            lines.append("if %s:" % condition)
+            lines.append("    return %d" % self.start)
+        return lines
+
+    def _exit(self, index):
+        """Get lines storing variables back and leaving the loop at index"""
+        lines = ["f%d[%d] = %s" % (key[0], key[1], self.names[key])
+                 for key in sorted(self.stored)]
+        return lines + ["return %d" % index]
+
+    def _guard(self, condition, index):
+        return ["if %s:" % condition] + ["    " + line for line in self._exit(index)]
+
+    def _read(self, arg, observed):
+        """Get expression of operand and its type, None if types disagree"""
+        if arg.type != DataType.VAR:
+            return (_literal(arg.value), PYTHON_TYPES[arg.type])
+        key = (arg.frame, arg.slot)
+        if key not in self.names:
+            self.names[key] = "v%d" % len(self.names)
+        if key not in self.types:
+            self.entry_types[key] = observed
+            self.types[key] = observed
+        if self.types[key] is not observed:
+            return None
+        return (self.names[key], observed)
+
+    def _write(self, arg, data_type):
+        """Get name of destination variable"""
+        key = (arg.frame, arg.slot)
+        if key not in self.types:
+            self.entry_types[key] = None
+        self.types[key] = data_type
+        return self.names[key]
+
+    def _instruction(self, index, kind, instruction, observed, next_ip):
+        """Get lines of one instruction, None if it cannot be compiled"""
+        operands = {}
+        for position in TRACEABLE[kind]:
+            operand = self._read(instruction.args[position], observed.get(position))
+            if operand is None:
+                return None
+            operands[position] = operand
+        if kind in (ins.Label, ins.Jump):
+            return []
+        if kind in (ins.JumpIfEq, ins.JumpIfNeq):
+            return self._conditional_jump(index, kind, instruction, operands, next_ip)
+        if kind is ins.Write:
+            return _write_value(*operands[0])
+        if kind is ins.Move:
+            (a, data_type) = operands[1]
+            return ["%s = %s" % (self._write(instruction.args[0], data_type), a)]
+        lines = []
+        if kind is ins.IDiv:
+            lines = self._guard("%s == 0" % operands[2][0], index)
+        elif kind in (ins.Stri2Int, ins.GetChar):
+            (a, b) = (operands[1][0], operands[2][0])
+            lines = self._guard("%s < 0 or %s >= len(%s)" % (b, b, a), index)
+        elif kind is ins.Int2Char:
+            lines = self._guard("not 0 <= %s <= 0x10FFFF" % operands[1][0], index)
+        elif kind is ins.SetChar:
+            (a, b, c) = (operands[0][0], operands[1][0], operands[2][0])
+            lines = self._guard("%s < 0 or %s >= len(%s) or len(%s) == 0" % (b, b, a, c), index)
+        if kind in OPERATORS:
+            expression = "%s %s %s" % (operands[1][0], OPERATORS[kind], operands[2][0])
+        elif kind is ins.Not:
+            expression = "not %s" % operands[1][0]
+        elif kind is ins.Int2Char:
+            expression = "chr(%s)" % operands[1][0]
+        elif kind is ins.Stri2Int:
+            expression = "ord(%s[%s])" % (operands[1][0], operands[2][0])
+        elif kind is ins.StrLen:
+            expression = "len(%s)" % operands[1][0]
+        elif kind is ins.GetChar:
+            expression = "%s[%s]" % (operands[1][0], operands[2][0])
+        else:
+            (a, b, c) = (operands[0][0], operands[1][0], operands[2][0])
+            expression = "%s[:%s] + %s[0] + %s[%s + 1:]" % (a, b, c, a, b)
+        dst = self._write(instruction.args[0], RESULT_TYPES[kind])
+        return lines + ["%s = %s" % (dst, expression)]
+
+    def _conditional_jump(self, index, kind, instruction, operands, next_ip):
+        if instruction.target == index + 1:
+            return []
+        condition = "%s == %s" % (operands[1][0], operands[2][0])
+        taken = (next_ip == instruction.target)
+        if (kind is ins.JumpIfEq) == taken:
+            condition = "not (%s)" % condition
+        # Leave the loop where the jump goes when it goes another way
+        return self._guard(condition, index + 1 if taken else instruction.target)
+
+
+def _literal(value):
+    if value is NIL:
+        return "NIL"
+    return repr(value)
+
+
+def _write_value(expression, data_type):
+    if data_type is bool:
+        return ['write("true" if %s else "false")' % expression]
+    if data_type is type(NIL):
+        return []
+    if data_type is str:
+        return ["write(%s)" % expression]
+    return ["write(str(%s))" % expression]
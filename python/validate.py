@@ -2,7 +2,15 @@
 
 import re
 from enum import Enum
-from error import StatusCode, exit_program
+from error import StatusCode
+
+
+class ValidationError(Exception):
+    """Invalid XML structure"""
+
+    def __init__(self, status_code, message):
+        super().__init__(message)
+        self.status_code = status_code
 
 
 class Arg(Enum):
@@ -52,136 +60,176 @@ INSTRUCTIONS = {
     'BREAK': []
 }
 
+
+class LazyPattern:
+    """Regular expression compiled when it is used for the first time
+
+    Compiled methods replace the lazy ones on the instance, so later
+    calls go straight to the compiled pattern.
+    """
+
+    def __init__(self, pattern):
+        self.pattern = pattern
+
+    def match(self, text):
+        """Match text from its start"""
+        self.compile()
+        return self.match(text)
+
+    def sub(self, replacement, text):
+        """Replace all occurrences in text"""
+        self.compile()
+        return self.sub(replacement, text)
+
+    def compile(self):
+        """Compile the pattern now"""
+        compiled = re.compile(self.pattern)
+        self.match = compiled.match
+        self.sub = compiled.sub
+
+
 # Regex patterns
-VAR_RE = re.compile(r"^([GLT]F@[_\-$\&%\*!\?a-zA-Z][_\-$\&%\*!\?a-zA-Z0-9]*)$")
-LABEL_RE = re.compile(r"^([_\-$\&%\*!\?a-zA-Z][_\-$\&%\*!\?a-zA-Z0-9]*)$")
-BOOL_RE = re.compile(r"^(true|false)$")
-NIL_RE = re.compile(r"^nil$")
-INT_RE = re.compile(
+VAR_RE = LazyPattern(r"^([GLT]F@[_\-$\&%\*!\?a-zA-Z][_\-$\&%\*!\?a-zA-Z0-9]*)$")
+LABEL_RE = LazyPattern(r"^([_\-$\&%\*!\?a-zA-Z][_\-$\&%\*!\?a-zA-Z0-9]*)$")
+BOOL_RE = LazyPattern(r"^(true|false)$")
+NIL_RE = LazyPattern(r"^nil$")
+INT_RE = LazyPattern(
     r"^[+-]?((?:[1-9][0-9]*(_[0-9]+)*|0)|(?:0[xX][0-9a-fA-F]+(_[0-9a-fA-F]+)*)|(?:0[oO]?[0-7]+(_[0-7]+)*))$")
-STRING_RE = re.compile(r"^(?:(?:\\\d{3})|[^\\])*$")
-TYPE_RE = re.compile(r"^(int|string|bool)$")
+STRING_RE = LazyPattern(r"^(?:(?:\\\d{3})|[^\\])*$")
+TYPE_RE = LazyPattern(r"^(int|string|bool)$")
 
 
-def validate_xml(xml):
-    """Validate XML structure"""
+def validate_root(root):
+    """Validate root element, raise ValidationError if invalid"""
     try:
-        """Validate XML structure"""
-        root = xml.find('.')
         # Check if root has correct name
         if root.tag != "program":
-            exit_program(StatusCode.INVALID_STRUCTURE, "Invalid root tag")
+            raise ValidationError(StatusCode.INVALID_STRUCTURE, "Invalid root tag")
         # Check language
         if "language" not in root.attrib or root.attrib["language"] != "IPPcode23":
-            exit_program(StatusCode.INVALID_STRUCTURE,
-                         "Invalid root attribute language")
+            raise ValidationError(StatusCode.INVALID_STRUCTURE,
+                                  "Invalid root attribute language")
         # Check for invalid attributes
         valid_attributes = ["language", "name", "description"]
         for attribute in root.attrib:
             if attribute not in valid_attributes:
-                exit_program(StatusCode.INVALID_STRUCTURE,
-                             "Invalid root attribute")
-
-        labels = []
-        orders = []
-
-        # Check instructions
-        for child in root:
-            # Check if instruction has correct name
-            if child.tag != "instruction":
-                exit_program(StatusCode.INVALID_STRUCTURE,
-                             "Invalid instruction tag")
-            # Check number of attributes
-            if len(child.attrib) != 2:
-                exit_program(StatusCode.INVALID_STRUCTURE,
-                             "Invalid instruction attributes")
-            # Check for invalid attributes
-            valid_attributes = ["order", "opcode"]
-            for attribute in child.attrib:
-                if attribute not in valid_attributes:
-                    exit_program(StatusCode.INVALID_STRUCTURE,
-                                 "Invalid instruction attribute")
-            # Check order
-            order = child.attrib["order"]
-            if not order.isnumeric() or int(order) < 1:
-                exit_program(StatusCode.INVALID_STRUCTURE,
-                             "Invalid instruction order")
-            if int(order) in orders:
-                exit_program(StatusCode.INVALID_STRUCTURE,
-                             "Duplicate instruction order")
-            orders.append(int(order))
-            # Check for invalid opcode
-            opcode = child.attrib["opcode"].upper()
-            if opcode not in INSTRUCTIONS:
-                exit_program(StatusCode.INVALID_STRUCTURE,
-                             "Invalid instruction opcode")
-            # Check for invalid number of arguments
-            if len(child) != len(INSTRUCTIONS[opcode]):
-                exit_program(StatusCode.INVALID_STRUCTURE,
-                             "Invalid number of arguments")
-            # Check argument names
-            arg_names = ["arg" + str(x + 1) for x in range(len(child))]
-            for index, arg in enumerate(arg_names):
-                argument = child.find(arg)
-                if argument is None:
-                    exit_program(StatusCode.INVALID_STRUCTURE,
-                                 "Invalid argument name")
-                if len(argument.attrib) != 1 or "type" not in argument.attrib:
-                    exit_program(StatusCode.INVALID_STRUCTURE,
-                                 "Invalid argument attributes")
-                arg_type = INSTRUCTIONS[opcode][index]
-                text = argument.text
-                if text is not None:
-                    text = text.strip()
-                if arg_type == Arg.VARIABLE:
-                    if argument.attrib["type"] != "var":
-                        exit_program(StatusCode.INVALID_STRUCTURE,
-                                     "Invalid argument type")
+                raise ValidationError(StatusCode.INVALID_STRUCTURE,
+                                      "Invalid root attribute")
+    except ValidationError:
+        raise
+    except Exception as e:
+        raise ValidationError(StatusCode.INVALID_STRUCTURE, e)
+
+
+def validate_instruction(child, labels, orders):
+    """Validate instruction element, raise ValidationError if invalid
+
+    Labels and orders seen so far are collected in given sets. Returns
+    opcode, order and list of argument (type, text) pairs, so the
+    instruction can be created without looking at the element again.
+    """
+    try:
+        # Check if instruction has correct name
+        if child.tag != "instruction":
+            raise ValidationError(StatusCode.INVALID_STRUCTURE,
+                                  "Invalid instruction tag")
+        # Check number of attributes
+        if len(child.attrib) != 2:
+            raise ValidationError(StatusCode.INVALID_STRUCTURE,
+                                  "Invalid instruction attributes")
+        # Check for invalid attributes
+        valid_attributes = ["order", "opcode"]
+        for attribute in child.attrib:
+            if attribute not in valid_attributes:
+                raise ValidationError(StatusCode.INVALID_STRUCTURE,
+                                      "Invalid instruction attribute")
+        # Check order
+        order = child.attrib["order"]
+        if not order.isnumeric() or int(order) < 1:
+            raise ValidationError(StatusCode.INVALID_STRUCTURE,
+                                  "Invalid instruction order")
+        order = int(order)
+        if order in orders:
+            raise ValidationError(StatusCode.INVALID_STRUCTURE,
+                                  "Duplicate instruction order")
+        orders.add(order)
+        # Check for invalid opcode
+        opcode = child.attrib["opcode"].upper()
+        if opcode not in INSTRUCTIONS:
+            raise ValidationError(StatusCode.INVALID_STRUCTURE,
+                                  "Invalid instruction opcode")
+        # Check for invalid number of arguments
+        if len(child) != len(INSTRUCTIONS[opcode]):
+            raise ValidationError(StatusCode.INVALID_STRUCTURE,
+                                  "Invalid number of arguments")
+        # Check argument names
+        arg_names = ["arg" + str(x + 1) for x in range(len(child))]
+        arguments = []
+        for index, arg in enumerate(arg_names):
+            argument = child.find(arg)
+            if argument is None:
+                raise ValidationError(StatusCode.INVALID_STRUCTURE,
+                                      "Invalid argument name")
+            if len(argument.attrib) != 1 or "type" not in argument.attrib:
+                raise ValidationError(StatusCode.INVALID_STRUCTURE,
+                                      "Invalid argument attributes")
+            arg_type = INSTRUCTIONS[opcode][index]
+            text = argument.text
+            if text is not None:
+                text = text.strip()
+            if arg_type == Arg.VARIABLE:
+                if argument.attrib["type"] != "var":
+                    raise ValidationError(StatusCode.INVALID_STRUCTURE,
+                                          "Invalid argument type")
+                if not VAR_RE.match(text):
+                    raise ValidationError(StatusCode.INVALID_STRUCTURE,
+                                          "Invalid variable name")
+            elif arg_type == Arg.SYMBOL:
+                if argument.attrib["type"] not in ["var", "int", "string", "bool", "nil"]:
+                    raise ValidationError(StatusCode.INVALID_STRUCTURE,
+                                          "Invalid argument type")
+                if argument.attrib["type"] == "var":
                     if not VAR_RE.match(text):
-                        exit_program(StatusCode.INVALID_STRUCTURE,
-                                     "Invalid variable name")
-                elif arg_type == Arg.SYMBOL:
-                    if argument.attrib["type"] not in ["var", "int", "string", "bool", "nil"]:
-                        exit_program(StatusCode.INVALID_STRUCTURE,
-                                     "Invalid argument type")
-                    if argument.attrib["type"] == "var":
-                        if not VAR_RE.match(text):
-                            exit_program(StatusCode.INVALID_STRUCTURE,
-                                         "Invalid variable name")
-                    elif argument.attrib["type"] == "int":
-                        if not INT_RE.match(text):
-                            exit_program(StatusCode.INVALID_STRUCTURE,
-                                         "Invalid integer")
-                    elif argument.attrib["type"] == "string":
-                        if text is not None and not STRING_RE.match(text):
-                            exit_program(StatusCode.INVALID_STRUCTURE,
-                                         "Invalid string")
-                    elif argument.attrib["type"] == "bool":
-                        if not BOOL_RE.match(text):
-                            exit_program(StatusCode.INVALID_STRUCTURE,
-                                         "Invalid boolean")
-                    elif argument.attrib["type"] == "nil":
-                        if not NIL_RE.match(text):
-                            exit_program(StatusCode.INVALID_STRUCTURE,
-                                         "Invalid nil")
-                elif arg_type == Arg.LABEL:
-                    if argument.attrib["type"] != "label":
-                        exit_program(StatusCode.INVALID_STRUCTURE,
-                                     "Invalid argument type")
-                    if not LABEL_RE.match(text):
-                        exit_program(StatusCode.INVALID_STRUCTURE,
-                                     "Invalid label name")
-                    if opcode == "LABEL":
-                        if text in labels:
-                            exit_program(StatusCode.SEMANTIC_ERROR,
-                                         "Label already defined")
-                        labels.append(text)
-                elif arg_type == Arg.TYPE:
-                    if argument.attrib["type"] != "type":
-                        exit_program(StatusCode.INVALID_STRUCTURE,
-                                     "Invalid argument type")
-                    if not TYPE_RE.match(text):
-                        exit_program(StatusCode.INVALID_STRUCTURE,
-                                     "Invalid type")
+                        raise ValidationError(StatusCode.INVALID_STRUCTURE,
+                                              "Invalid variable name")
+                elif argument.attrib["type"] == "int":
+                    if not INT_RE.match(text):
+                        raise ValidationError(StatusCode.INVALID_STRUCTURE,
+                                              "Invalid integer")
+                elif argument.attrib["type"] == "string":
+                    if text is not None and not STRING_RE.match(text):
+                        raise ValidationError(StatusCode.INVALID_STRUCTURE,
+                                              "Invalid string")
+                elif argument.attrib["type"] == "bool":
+                    if not BOOL_RE.match(text):
+                        raise ValidationError(StatusCode.INVALID_STRUCTURE,
+                                              "Invalid boolean")
+                elif argument.attrib["type"] == "nil":
+                    if not NIL_RE.match(text):
+                        raise ValidationError(StatusCode.INVALID_STRUCTURE,
+                                              "Invalid nil")
+            elif arg_type == Arg.LABEL:
+                if argument.attrib["type"] != "label":
+                    raise ValidationError(StatusCode.INVALID_STRUCTURE,
+                                          "Invalid argument type")
+                if not LABEL_RE.match(text):
+                    raise ValidationError(StatusCode.INVALID_STRUCTURE,
+                                          "Invalid label name")
+                if opcode == "LABEL":
+                    if text in labels:
+                        raise ValidationError(StatusCode.SEMANTIC_ERROR,
+                                              "Label already defined")
+                    labels.add(text)
+            elif arg_type == Arg.TYPE:
+                if argument.attrib["type"] != "type":
+                    raise ValidationError(StatusCode.INVALID_STRUCTURE,
+                                          "Invalid argument type")
+                if not TYPE_RE.match(text):
+                    raise ValidationError(StatusCode.INVALID_STRUCTURE,
+                                          "Invalid type")
+            arguments.append((argument.attrib["type"], text))
+        return (opcode, order, arguments)
+    except ValidationError:
+        raise
     except Exception as e:
-        exit_program(StatusCode.INVALID_STRUCTURE, e)
+        raise ValidationError(StatusCode.INVALID_STRUCTURE, e)
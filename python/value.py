@@ -0,0 +1,78 @@
+"""Runtime values
+
+Values are plain Python objects: int, str and bool, the NIL singleton
+for nil and the UNINITIALIZED sentinel for defined variables without a
+value. Type of a value is derived from the object itself.
+"""
+
+from enum import Enum
+from error import exit_program, StatusCode
+
+
+class DataType(Enum):
+    """Variable types"""
+    INT = 1
+    STRING = 2
+    BOOL = 3
+    NIL = 4
+    LABEL = 5
+    TYPE = 6
+    VAR = 7
+
+    @staticmethod
+    def from_string(string):
+        """Convert string to type"""
+        if string == "int":
+            return DataType.INT
+        elif string == "bool":
+            return DataType.BOOL
+        elif string == "string":
+            return DataType.STRING
+        elif string == "nil":
+            return DataType.NIL
+        elif string == "label":
+            return DataType.LABEL
+        elif string == "type":
+            return DataType.TYPE
+        elif string == "var":
+            return DataType.VAR
+        else:
+            exit_program(StatusCode.MALLFORMED, "Invalid argument type")
+
+
+class Nil:
+    """Type of the nil value"""
+
+    def __repr__(self):
+        return "nil"
+
+    def __reduce__(self):
+        # Keep the singleton when unpickled
+        return "NIL"
+
+
+class Uninitialized:
+    """Type of the value of variables which were not assigned yet"""
+
+    def __repr__(self):
+        return "uninitialized"
+
+    def __reduce__(self):
+        return "UNINITIALIZED"
+
+
+NIL = Nil()
+UNINITIALIZED = Uninitialized()
+
+# Types of initialized values
+TYPES = {
+    int: DataType.INT,
+    str: DataType.STRING,
+    bool: DataType.BOOL,
+    Nil: DataType.NIL,
+}
+
+
+def type_of(value):
+    """Get type of value, None if value is not initialized"""
+    return TYPES.get(type(value))